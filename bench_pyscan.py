@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# bench_pyscan.py — pyScan benchmarks (loopback / offline, authorized use only)
+from __future__ import annotations
+import asyncio, argparse, resource, sys, time, json, queue, socket, platform, datetime, subprocess, itertools
+import multiprocessing as mp
+from typing import Any, Dict, List, Tuple
+from pyscan_oop import AsyncPortScanner, ScanConfig, PortResult, count_hosts
+
+def peak_rss_mb() -> float:
+    # Linux'ta ru_maxrss KiB, macOS'ta byte
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024*1024) if sys.platform == "darwin" else rss / 1024
+
+# ---------- memory: /16 x 1-65535 work generation ----------
+class _NullProbeScanner(AsyncPortScanner):
+    # ağa çıkmadan sonuç üretir; yalnızca iş üretimi + worker havuzunun maliyeti ölçülür
+    async def _probe_tcp(self, host: str, port: int) -> Tuple[PortResult, Any]:
+        await asyncio.sleep(0)
+        return PortResult(host, port, "CLOSED", "", 0), None
+
+async def _run_memory(cfg: ScanConfig, limit: int, every: int) -> None:
+    done = 0
+    stop = asyncio.get_running_loop().create_future()
+    t0 = time.perf_counter()
+    def emit(r: PortResult) -> None:
+        nonlocal done
+        done += 1
+        if done % every == 0:
+            print(f"  probes={done:>10,}  peak_rss={peak_rss_mb():7.1f} MB  rate={done/(time.perf_counter()-t0):,.0f}/s")
+        if done >= limit and not stop.done():
+            stop.set_result(None)
+    task = asyncio.create_task(_NullProbeScanner(cfg).scan(emit))
+    await asyncio.wait([task, stop], return_when=asyncio.FIRST_COMPLETED)
+    task.cancel()
+    try: await task
+    except asyncio.CancelledError: pass
+
+def bench_memory(args) -> None:
+    # discovery kapalı: null probe her hostu canlı gösterir, keşif turu ölçülen iş üretimini gölgeler
+    cfg = ScanConfig(targets=[args.target], ports=list(range(1, 65536)), concurrency=args.concurrency,
+                     discovery=False)
+    total = count_hosts(cfg.targets) * len(cfg.ports)
+    print(f"[i] memory: {args.target} x 1-65535 = {total:,} probes (running first {args.limit:,}), c={cfg.concurrency}")
+    print(f"  baseline peak_rss={peak_rss_mb():.1f} MB")
+    asyncio.run(_run_memory(cfg, args.limit, max(1, args.limit // 10)))
+    print(f"[+] peak_rss={peak_rss_mb():.1f} MB")
+
+# ---------- scan: loopback fake targets x (engine, concurrency, timeout) ----------
+# ground truth sınıfları ve pyscan'in bunlar için vermesi gereken durum
+EXPECTED = {"banner": "OPEN", "silent": "OPEN", "refused": "CLOSED", "filtered": "FILTERED/TIMEOUT"}
+
+def _fill_backlog(lst: socket.socket, hold: List[socket.socket]) -> bool:
+    # listen(0) + kabul edilmeyen bağlantılar: kuyruk dolunca yeni SYN'ler düşer (filtrelenmiş port gibi)
+    addr = lst.getsockname()
+    for _ in range(64):
+        c = socket.socket(); c.settimeout(0.05)
+        try:
+            c.connect(addr); hold.append(c)
+        except (socket.timeout, TimeoutError):
+            c.close(); return True
+        except OSError:
+            c.close(); return False
+    return False
+
+def _raise_nofile() -> None:
+    # her refused/filtered port bir fd tutar: soft limit hard limite çekilir
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try: resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError): pass
+
+def _serve_fakes(spec: Dict[str, int], host: str, conn) -> None:
+    # ayrı süreç: ölçülen tarayıcının CPU/RSS'ine karışmaz
+    try:
+        _raise_nofile()
+        _serve_fakes_loop(spec, host, conn)
+    except OSError as e:
+        conn.send(e)
+
+def _serve_fakes_loop(spec: Dict[str, int], host: str, conn) -> None:
+    truth: Dict[int, str] = {}
+    keep: List[socket.socket] = []
+    def bind() -> socket.socket:
+        s = socket.socket(); s.bind((host, 0)); keep.append(s); return s
+    servers = {k: [bind() for _ in range(spec[k])] for k in ("banner", "silent")}
+    for _ in range(spec["refused"]):
+        truth[bind().getsockname()[1]] = "refused"          # bind edilmiş ama dinlemeyen port RST döner
+    for _ in range(spec["filtered"]):
+        s = bind(); s.listen(0)
+        if _fill_backlog(s, keep): truth[s.getsockname()[1]] = "filtered"
+    async def banner(reader, writer) -> None:
+        writer.write(f"BENCH-{writer.get_extra_info('sockname')[1]}\r\n".encode())
+        try: await writer.drain(); await reader.read(1)
+        except OSError: pass
+        writer.close()
+    async def silent(reader, writer) -> None:
+        try: await reader.read(1)
+        except OSError: pass
+        writer.close()
+    async def run() -> None:
+        for kind, cb in (("banner", banner), ("silent", silent)):
+            for s in servers[kind]:
+                s.listen(1024)
+                await asyncio.start_server(cb, sock=s)
+                truth[s.getsockname()[1]] = kind
+        conn.send(truth)
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)    # durdurma sinyali
+    asyncio.run(run())
+
+class FakeTargets:
+    def __init__(self, spec: Dict[str, int], host: str = "127.0.0.1") -> None:
+        self.spec, self.host = spec, host
+        self.truth: Dict[int, str] = {}
+
+    def __enter__(self) -> "FakeTargets":
+        self._conn, child = mp.Pipe()
+        self._proc = mp.Process(target=_serve_fakes, args=(self.spec, self.host, child), daemon=True)
+        self._proc.start()
+        truth = self._conn.recv()
+        if isinstance(truth, Exception):
+            self._proc.join()
+            raise SystemExit(f"[-] fake targets could not start: {truth}")
+        self.truth = truth
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try: self._conn.send("stop")
+        except OSError: pass
+        self._proc.join(timeout=2.0)
+        if self._proc.is_alive(): self._proc.terminate()
+
+def _pct(values: List[float], q: float) -> float | None:
+    if not values: return None
+    v = sorted(values)
+    return v[min(len(v) - 1, int(q * len(v)))]
+
+def _bench_one(cfg: ScanConfig, truth: Dict[int, str], out) -> None:
+    # her koşu ayrı süreçte: peak RSS koşuya özgü olur
+    lat: List[float] = []
+    class Timed(AsyncPortScanner):
+        async def _probe_tcp(self, host: str, port: int) -> Tuple[PortResult, Any]:
+            t0 = time.perf_counter()
+            try: return await super()._probe_tcp(host, port)
+            finally: lat.append((time.perf_counter() - t0) * 1000)
+    results: List[PortResult] = []
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    asyncio.run(Timed(cfg).scan(results.append))
+    elapsed = time.perf_counter() - t0
+    # accuracy: durum doğruluğu; banner_recall: banner portlarında banner'ın gerçekten okunma oranı (ayrı ölçülür)
+    ok = grabbed = 0
+    miss: Dict[str, int] = {}
+    for r in results:
+        kind = truth[r.port]
+        if kind == "banner" and r.banner.startswith(f"BENCH-{r.port}"): grabbed += 1
+        if r.state == EXPECTED[kind]:
+            ok += 1; continue
+        key = f"{kind}->{r.state}"
+        miss[key] = miss.get(key, 0) + 1
+    nbanner = sum(1 for v in truth.values() if v == "banner")
+    out.put({"engine": cfg.engine, "concurrency": cfg.concurrency, "timeout": cfg.timeout, "enrich": cfg.enrich,
+             "probes": len(results), "elapsed_s": round(elapsed, 3),
+             "probes_per_sec": round(len(results) / elapsed, 1) if elapsed else None,
+             "p50_ms": round(_pct(lat, 0.50), 3) if lat else None, "p99_ms": round(_pct(lat, 0.99), 3) if lat else None,
+             "peak_rss_mb": round(peak_rss_mb(), 1), "baseline_rss_mb": round(base, 1),
+             "accuracy": round(ok / len(truth), 4) if truth else None,
+             "banner_recall": round(grabbed / nbanner, 4) if (nbanner and cfg.enrich) else None,
+             "missing": len(truth) - len(results),
+             "mismatches": miss})
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def bench_scan(args) -> None:
+    spec = {"banner": args.banner, "silent": args.silent, "refused": args.refused, "filtered": args.filtered}
+    grid = list(itertools.product(args.engine.split(","), [int(c) for c in args.concurrency.split(",")],
+                                  [float(t) for t in args.timeout.split(",")]))
+    runs: List[Dict[str, Any]] = []
+    with FakeTargets(spec, args.host) as fakes:
+        truth = fakes.truth
+        counts = {k: sum(1 for v in truth.values() if v == k) for k in EXPECTED}
+        print(f"[i] fake targets on {args.host}: " + ", ".join(f"{k}={n}" for k, n in counts.items()))
+        if counts["filtered"] < args.filtered:
+            print("[!] some filtered listeners accepted every connection (backlog not full); they were left out", file=sys.stderr)
+        print(f"  {'engine':<7}{'c':>6}{'t':>6}{'probes/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'rss MB':>8}{'acc':>8}{'banner':>8}")
+        for engine, c, t in grid:
+            for _ in range(args.repeat):
+                cfg = ScanConfig(targets=[args.host], ports=sorted(truth), concurrency=c, timeout=t, engine=engine,
+                                 host_concurrency=args.host_concurrency, enrich=not args.no_enrich,
+                                 discovery=False, retries=args.retries)
+                q: mp.Queue = mp.Queue()
+                p = mp.Process(target=_bench_one, args=(cfg, truth, q)); p.start()
+                while True:
+                    try:
+                        run = q.get(timeout=1.0); break
+                    except queue.Empty:
+                        if not p.is_alive(): sys.exit(f"[-] run engine={engine} c={c} t={t} crashed (exit {p.exitcode})")
+                p.join()
+                runs.append(run)
+                print(f"  {engine:<7}{c:>6}{t:>6}{run['probes_per_sec']:>11,.0f}{run['p50_ms']:>9.2f}{run['p99_ms']:>9.2f}"
+                      f"{run['peak_rss_mb']:>8.1f}{run['accuracy']:>8.2%}"
+                      + (f"{run['banner_recall']:>8.2%}" if run["banner_recall"] is not None else f"{'-':>8}")
+                      + (f"  {run['mismatches']}" if run["mismatches"] else ""))
+    if args.out:
+        doc = {"created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+               "git": _git_rev(), "python": platform.python_version(), "platform": platform.platform(),
+               "targets": counts, "runs": runs}
+        with open(args.out, "w", encoding="utf-8") as f: json.dump(doc, f, indent=2)
+        print(f"[+] JSON -> {args.out}")
+
+def bench_compare(args) -> None:
+    # iki JSON sonucu (engine, c, t) anahtarıyla eşleştirilir; birden çok tekrarın ortalaması alınır
+    def load(path: str) -> Dict[Tuple[Any, ...], Dict[str, float]]:
+        with open(path, encoding="utf-8") as f: runs = json.load(f)["runs"]
+        groups: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+        for r in runs: groups.setdefault((r["engine"], r["concurrency"], r["timeout"]), []).append(r)
+        return {k: {m: sum(r[m] for r in v) / len(v) for m in ("probes_per_sec", "p99_ms", "peak_rss_mb", "accuracy")}
+                for k, v in groups.items()}
+    old, new = load(args.old), load(args.new)
+    delta = lambda a, b: f"{(b - a) / a:+7.1%}" if a else "    n/a"
+    print(f"  {'engine':<7}{'c':>6}{'t':>6}{'probes/s':>11}{'Δ':>8}{'p99 ms':>9}{'Δ':>8}{'rss MB':>8}{'Δ':>8}{'acc':>8}")
+    for k in sorted(set(old) & set(new)):
+        a, b = old[k], new[k]
+        print(f"  {k[0]:<7}{k[1]:>6}{k[2]:>6}{b['probes_per_sec']:>11,.0f}{delta(a['probes_per_sec'], b['probes_per_sec'])}"
+              f"{b['p99_ms']:>9.2f}{delta(a['p99_ms'], b['p99_ms'])}{b['peak_rss_mb']:>8.1f}"
+              f"{delta(a['peak_rss_mb'], b['peak_rss_mb'])}{b['accuracy']:>8.2%}")
+    for k in sorted(set(old) ^ set(new)):
+        print(f"  (only in {'old' if k in old else 'new'}: engine={k[0]} c={k[1]} t={k[2]})")
+
+def main():
+    ap = argparse.ArgumentParser(description="pyScan benchmarks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("memory", help="Peak RSS of streaming work generation (no network)")
+    m.add_argument("--target", default="10.0.0.0/16")
+    m.add_argument("-c","--concurrency", type=int, default=200)
+    m.add_argument("--limit", type=int, default=2_000_000, help="Stop after this many probes")
+    sc = sub.add_parser("scan", help="Probes/s, latency, RSS and accuracy against loopback fake targets")
+    sc.add_argument("--host", default="127.0.0.1", help="Loopback address the fake targets bind to")
+    sc.add_argument("--banner", type=int, default=100, help="Ports that accept and send a banner")
+    sc.add_argument("--silent", type=int, default=50, help="Ports that accept and stay silent")
+    sc.add_argument("--refused", type=int, default=2000, help="Ports that refuse (RST)")
+    sc.add_argument("--filtered", type=int, default=20, help="Ports that drop SYNs (listener with a full backlog)")
+    sc.add_argument("-c","--concurrency", default="100,500", help="Comma-separated values to sweep")
+    sc.add_argument("-t","--timeout", default="0.5", help="Comma-separated values to sweep")
+    sc.add_argument("--engine", default="stream,socket", help="Comma-separated: stream,socket")
+    sc.add_argument("--host-concurrency", type=int, default=0, help="Per-host cap (all fakes share one host; 0 = no cap)")
+    sc.add_argument("--retries", type=int, default=0)
+    sc.add_argument("--no-enrich", action="store_true", help="Skip banner/TLS stage (banner ports then only need OPEN)")
+    sc.add_argument("--repeat", type=int, default=1, help="Runs per setting")
+    sc.add_argument("--out", help="Write results as JSON (compare runs later with the compare command)")
+    cp = sub.add_parser("compare", help="Compare two scan benchmark JSON files")
+    cp.add_argument("old"); cp.add_argument("new")
+    args = ap.parse_args()
+    if args.cmd == "memory": bench_memory(args)
+    elif args.cmd == "scan": bench_scan(args)
+    elif args.cmd == "compare": bench_compare(args)
+
+if __name__ == "__main__":
+    main()
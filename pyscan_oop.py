@@ -1,29 +1,100 @@
 #!/usr/bin/env python3
 # pyscan_oop.py — OOP nmap-like async port scanner
 from __future__ import annotations
-import asyncio, argparse, ipaddress, ssl, json, time, random, datetime, socket
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Any, Iterable
+import asyncio, argparse, ipaddress, re, ssl, json, csv, sys, time, random, datetime, socket, errno, struct, os, hashlib, bisect, sqlite3, zlib, queue, functools, collections, threading, itertools
+import http.server
+import multiprocessing as mp
+from abc import ABC, abstractmethod
+from array import array
+from enum import IntEnum
+from dataclasses import dataclass, field
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Callable
 
 # ---------- Domain Models ----------
+DISCOVERY_PORTS = (80, 443, 22, 445, 3389, 139, 135, 8080, 25, 53)
+
 @dataclass
 class ScanConfig:
-    targets: List[str]
+    targets: List[str]             # host / CIDR specs, expanded lazily (iter_hosts)
     ports: List[int]
-    concurrency: int = 200
+    concurrency: int = 200         # adaptive_concurrency açıkken pencerenin üst sınırı
+    adaptive_concurrency: bool = False
+    host_concurrency: int = 0      # per-host in-flight cap (0 = no cap)
     timeout: float = 1.2
     jitter: float = 0.0
+    rate: float = 0.0              # global bağlantı/sn (0 = sınırsız)
+    host_rate: float = 0.0         # host başına bağlantı/sn (0 = sınırsız)
+    burst: int = 0                 # bucket kapasitesi (0 -> rate/10, en az 1)
     retries: int = 0
+    max_duration: float = 0.0      # sn; 0 = sınırsız. Dolunca tarama kesilir, kapsanmayan işler raporlanır
+    adaptive_timeout: bool = False # host başına ölçülen RTT'den connect timeout
+    min_timeout: float = 0.05
+    max_timeout: float = 3.0
+    engine: str = "stream"         # stream: asyncio streams | socket: raw non-blocking connect (hafif)
+    enrich: bool = True            # stage 2: açık portlarda banner/TLS
+    enrich_concurrency: int = 50
+    enrich_timeout: float | None = None   # None -> timeout
+    enrich_backlog: int = 256      # stage 2 kuyruğu (enrich_concurrency + bu) ve bekleyen en fazla açık bağlantı
+    discovery: bool = True         # CIDR'larda önce canlı host keşfi
+    discovery_ports: List[int] = field(default_factory=lambda: list(DISCOVERY_PORTS))
+    dns_ttl: float = 300.0         # çözümlenen isimlerin cache süresi (sn)
     html_out: str | None = None
     json_out: str | None = None
+    ndjson_out: str | None = None  # sonuç geldikçe yazılan akış çıktıları ("-" = stdout)
+    csv_out: str | None = None
+    drop_closed: bool = False      # akış çıktılarına CLOSED sonuçları yazma
+    journal: str | None = None     # tamamlanan işlerin append-only kaydı
+    resume: bool = False           # journal'daki tamamlanmış işleri atla
+    workers: int = 1               # süreç sayısı (her biri kendi event loop'u ile bir shard tarar)
+    shard: int = 0                 # bu sürecin shard'ı (0..shards-1)
+    shards: int = 1
+    shard_by: str = "host"         # host: hedefler ardışık aralıklara bölünür | port: port listesi dilimlenir (az host varsa)
+    serve: str | None = None       # coordinator: [HOST:]PORT adresinden worker'lara lease dağıt
+    connect: str | None = None     # worker: HOST:PORT coordinator'dan lease al
+    token: str = ""                # coordinator/worker paylaşılan anahtar (boşsa kontrol yok)
+    lease_size: int = 65536        # lease başına en fazla (host, port) çifti
+    lease_timeout: float = 30.0    # bu süre haber alınamayan worker'ın lease'i başkasına verilir
+    local_workers: int = 0         # coordinator ile birlikte başlatılacak yerel worker süreci
+    progress: float = 0.0          # stderr ilerleme satırı aralığı (sn, 0 = kapalı)
+    metrics_port: int | None = None  # 127.0.0.1 üzerinde Prometheus /metrics
+    trace: str | None = None       # probe başına aşama süreleri (NDJSON)
+    db: str | None = None          # SQLite sonuç geçmişi
+    diff: bool = False             # yalnızca değişiklikleri raporla (önce eski açık portlar, sonra bayat işler)
+    stale_after: float = 168.0     # saat; bu süredir bakılmamış (host, port) diff modunda yeniden taranır
 
-@dataclass
+class State(IntEnum):
+    # sonuç tablosunda 1 baytlık durum kodu; ERROR'un ayrıntısı ayrı (intern edilmiş) metin sütununda
+    OPEN = 0
+    CLOSED = 1
+    FILTERED = 2
+    ERROR = 3
+
+    @staticmethod
+    def encode(state: str) -> Tuple["State", str]:
+        code = _STATE_CODES.get(state)
+        if code is not None: return code, ""
+        if state.startswith("ERROR (") and state.endswith(")"): return State.ERROR, state[7:-1]
+        return State.ERROR, state
+
+    def text(self, detail: str = "") -> str:
+        return f"ERROR ({detail})" if self is State.ERROR else _STATE_TEXT[self]
+
+_STATE_TEXT = {State.OPEN: "OPEN", State.CLOSED: "CLOSED", State.FILTERED: "FILTERED/TIMEOUT"}
+_STATE_CODES = {v: k for k, v in _STATE_TEXT.items()}
+
+@dataclass(slots=True)
 class PortResult:
     host: str
     port: int
     state: str                 # OPEN / CLOSED / FILTERED/TIMEOUT / ERROR(...)
     banner: str = ""
     latency_ms: int | None = None
+    timeout_ms: int | None = None  # adaptive timeout: son denemede kullanılan (öğrenilmiş) timeout
+    service: str = ""          # probe tablosuyla tanınan servis (ssh, http, mysql ...)
 
 # ---------- Helpers ----------
 def parse_ports(pstr: str) -> List[int]:
@@ -42,6 +113,60 @@ def parse_ports(pstr: str) -> List[int]:
             if 1<=p<=65535: ports.add(p)
     return sorted(ports)
 
+def parse_intervals(text: str) -> Iterator[Tuple[int, int]]:
+    # "1-1024,3306" -> (1, 1024), (3306, 3306); aralıklar açılmaz (journal / uncovered okuma)
+    for part in text.split(","):
+        if not part: continue
+        a, _, b = part.partition("-")
+        yield int(a), int(b or a)
+
+def parse_duration(text: str) -> float:
+    # "90", "90s", "15m", "2h" -> saniye
+    text = text.strip().lower()
+    mult = {"s": 1, "m": 60, "h": 3600}.get(text[-1:], None)
+    value = float(text[:-1] if mult else text) * (mult or 1)
+    if value < 0: raise ValueError(text)
+    return value
+
+def format_ranges(values: Iterable[int]) -> str:
+    # sıralı tam sayılar -> "1-1024,3306" (parse_ports'un tersi)
+    out: List[str] = []
+    start = prev = None
+    for v in values:
+        if prev is not None and v == prev + 1:
+            prev = v; continue
+        if start is not None: out.append(f"{start}-{prev}" if prev != start else str(start))
+        start = prev = v
+    if start is not None: out.append(f"{start}-{prev}" if prev != start else str(start))
+    return ",".join(out)
+
+# TCP port frekans tablosu: ilk 100 nmap-services açıklık frekansı sırasında, ardından yerleşik profillerdeki ve
+# yaygın yönetim/veritabanı servis portları. Tablo dışındaki portlar numara sırasıyla sona gelir
+PORT_FREQUENCY = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554,
+    26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106,
+    2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+    1521, 6379, 27017, 5985, 5986, 9200, 11211, 2375, 2376, 1883, 636, 7001, 7002, 9000, 9090, 8181, 8880, 5901,
+    1000, 3001, 5001, 82, 1024, 6667, 5061, 25565,
+)
+_PORT_RANK = {p: i for i, p in enumerate(PORT_FREQUENCY)}
+
+def port_rank(port: int) -> int:
+    return _PORT_RANK.get(port, len(PORT_FREQUENCY) + port)
+
+def rank_ports(ports: Iterable[int]) -> List[int]:
+    # iş sırası: sık açık bulunan portlar önce (port-major döngüde her host için de önce bunlar denenir)
+    return sorted(ports, key=port_rank)
+
+def top_ports(n: int) -> List[int]:
+    # tablonun ilk n portu; n tabloyu aşarsa kalanlar 1-65535 numara sırasıyla doldurulur
+    out = list(PORT_FREQUENCY[:n])
+    if n > len(out):
+        out += [p for p in range(1, 65536) if p not in _PORT_RANK][:n - len(out)]
+    return sorted(out)
+
 def ports_for_profile(name: str | None) -> List[int]:
     if not name: return list(range(1,1025))
     match name:
@@ -51,138 +176,1400 @@ def ports_for_profile(name: str | None) -> List[int]:
         case "common": return [21,22,23,25,53,80,110,139,143,389,443,445,465,587,631,636,993,995,1433,1521,1723,1883,2049,2375,2376,25565,27017,3000,3306,3389,5432,5900,5985,5986,6379,7001,7002,8080,8081,8443,9000,9200,11211]
     return list(range(1,1025))
 
-def expand_targets(target: str) -> List[str]:
+@functools.lru_cache(maxsize=4096)
+def _as_network(spec: str):
+    # port-major döngüde aynı hedef her port için tekrar ayrıştırılmasın
+    try:
+        return ipaddress.ip_network(spec, strict=False)
+    except ValueError:
+        return None
+
+_ADDR = {4: ipaddress.IPv4Address, 6: ipaddress.IPv6Address}
+_BITS = {4: 32, 6: 128}
+
+def _ip_int(text: str) -> Tuple[int, int] | None:
+    # hızlı yol: inet_pton (C) ile adres -> (sürüm, tam sayı); ipaddress'ten ~10 kat hızlı (yüz binlerce hedef)
+    v, fam = (6, socket.AF_INET6) if ":" in text else (4, socket.AF_INET)
+    try:
+        return v, int.from_bytes(socket.inet_pton(fam, text), "big")
+    except OSError:
+        return None
+
+def _parse_range(spec: str, whole: bool = False) -> Tuple[int, int, int] | None:
+    # adres hedefi -> (sürüm, ilk, son) tam sayı aralığı; isimler için None.
+    # CIDR'da aralık taranan host kümesidir (IPv4 ağ/yayın, IPv6 ağ adresi hariç); whole=True tüm blok (exclude)
+    addr, slash, plen = spec.partition("/")
+    ip = _ip_int(addr)
+    if ip is not None and (not slash or plen.isdigit()) and int(plen or 0) <= _BITS[ip[0]]:
+        v, n = ip
+        size = 1 << (_BITS[v] - int(plen)) if slash else 1
+        lo = n & ~(size - 1); hi = lo + size - 1
+        if size > 2 and not whole:
+            lo += 1
+            if v == 4: hi -= 1
+        return v, lo, hi
+    a, sep, b = spec.partition("-")
+    if sep and (x := _ip_int(a.strip())) and (y := _ip_int(b.strip())):
+        if x[0] != y[0]: raise ValueError(f"mixed IPv4/IPv6 range: {spec}")
+        return x[0], min(x[1], y[1]), max(x[1], y[1])
+    net = _as_network(spec)                            # netmask yazımı, scope id'li IPv6 ...
+    if net is None: return None
+    return _parse_range(f"{net.network_address}/{net.prefixlen}", whole) if "%" not in str(net) else None
+
+_as_range = functools.lru_cache(maxsize=4096)(_parse_range)   # port-major döngüde her port için tekrar ayrıştırılmasın
+
+def _range_spec(version: int, lo: int, hi: int) -> str:
+    # aralık -> en kısa hedef yazımı: tek adres, host kümesi tam olarak bir CIDR'a denk geliyorsa CIDR, yoksa "a-b"
+    make = _ADDR[version]
+    if lo == hi: return str(make(lo))
+    def block(a: int, b: int) -> str | None:
+        n = b - a + 1
+        if n & (n - 1) or a % n: return None
+        return f"{make(a)}/{_BITS[version] - n.bit_length() + 1}"
+    if hi - lo == 1 and (cidr := block(lo, hi)): return cidr          # /31, /127: tüm adresler host
+    if lo > 0 and (cidr := block(lo - 1, hi + 1 if version == 4 else hi)): return cidr
+    return f"{make(lo)}-{make(hi)}"
+
+def iter_hosts(targets: Iterable[str]) -> Iterator[str]:
+    # CIDR / aralığı listeye açmadan host host üretir (/16 için 65k string tutulmaz)
+    for spec in targets:
+        r = _as_range(spec)
+        if r is None:
+            yield spec
+        else:
+            make = _ADDR[r[0]]
+            yield from (str(make(i)) for i in range(r[1], r[2] + 1))
+
+def count_hosts(targets: Iterable[str]) -> int:
+    n = 0
+    for spec in targets:
+        r = _as_range(spec)
+        n += 1 if r is None else r[2] - r[1] + 1
+    return n
+
+def iter_work(hosts: Callable[[], Iterable[str]], ports: Iterable[int]) -> Iterator[Tuple[str, int]]:
+    # port-major: her port tüm hostlara dönüşümlü dağıtılır (hosts() her port için baştan üretir)
+    for p in ports:
+        for h in hosts():
+            yield h, p
+
+def is_sweep_target(spec: str) -> bool:
+    # discovery yalnızca çok hostlu CIDR / aralıklara uygulanır
+    net = _as_network(spec)
+    if net is not None: return net.num_addresses > 2
+    r = _as_range(spec)
+    return r is not None and r[2] - r[1] >= 2
+
+class AddressSet:
+    # IPv4/IPv6 adres kümesi: sürüm başına sıralı, birleştirilmiş [lo, hi] tam sayı aralıkları.
+    # Eklemeler biriktirilir, ilk sorguda tek sıralama + birleştirmeyle normalize edilir (yüz binlerce
+    # örtüşen aralıkta da n log n); adresler hiçbir zaman tek tek açılmaz
+    def __init__(self) -> None:
+        self._iv: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        self._lo: Dict[int, List[int]] = {4: [], 6: []}
+        self._dirty = False
+
+    def add(self, version: int, lo: int, hi: int) -> None:
+        self._iv[version].append((lo, hi)); self._dirty = True
+
+    def add_spec(self, spec: str, whole: bool = False) -> bool:
+        r = _parse_range(spec, whole)                  # tek seferlik: cache'i doldurmaz
+        if r is None: return False                     # isim
+        self.add(*r)
+        return True
+
+    def _norm(self) -> None:
+        if not self._dirty: return
+        for v, iv in self._iv.items():
+            out: List[Tuple[int, int]] = []
+            for lo, hi in sorted(iv):
+                if out and lo <= out[-1][1] + 1:
+                    if hi > out[-1][1]: out[-1] = (out[-1][0], hi)
+                else:
+                    out.append((lo, hi))
+            self._iv[v] = out
+            self._lo[v] = [lo for lo, _ in out]
+        self._dirty = False
+
+    def subtract(self, other: "AddressSet") -> None:
+        # iki sıralı liste üzerinde tek geçiş
+        self._norm(); other._norm()
+        for v, iv in self._iv.items():
+            cut, out, j = other._iv[v], [], 0
+            for lo, hi in iv:
+                while j < len(cut) and cut[j][1] < lo: j += 1
+                k = j
+                while lo <= hi and k < len(cut) and cut[k][0] <= hi:
+                    if cut[k][0] > lo: out.append((lo, cut[k][0] - 1))
+                    lo = max(lo, cut[k][1] + 1); k += 1
+                if lo <= hi: out.append((lo, hi))
+            self._iv[v] = out
+            self._lo[v] = [lo for lo, _ in out]
+
+    def __contains__(self, host: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        self._norm()
+        v, n = ip.version, int(ip)
+        i = bisect.bisect_right(self._lo[v], n) - 1
+        return i >= 0 and self._iv[v][i][1] >= n
+
+    def count(self) -> int:
+        self._norm()
+        return sum(hi - lo + 1 for iv in self._iv.values() for lo, hi in iv)
+
+    def specs(self) -> List[str]:
+        self._norm()
+        return [_range_spec(v, lo, hi) for v in (4, 6) for lo, hi in self._iv[v]]
+
+    def split(self, n: int, offset: int = 0) -> List[List[str]]:
+        # n ardışık parça (adres sayıları en fazla 1 farklı); aralıklar parça sınırında bölünür.
+        # offset: fazladan adres alan parçaların başlangıcı (birden fazla küme bölünürken denge için)
+        total = self.count()
+        room = [total // n + ((k - offset) % n < total % n) for k in range(n)]
+        out: List[List[str]] = [[] for _ in range(n)]
+        k = 0
+        for v in (4, 6):
+            for lo, hi in self._iv[v]:
+                while lo <= hi:
+                    while not room[k]: k += 1
+                    take = min(room[k], hi - lo + 1)
+                    out[k].append(_range_spec(v, lo, lo + take - 1))
+                    lo += take; room[k] -= take
+        return out
+
+def build_targets(specs: Iterable[str], exclude: Iterable[str] = ()) -> Tuple[List[str], int]:
+    # hedef ve dışlama listeleri adres kümesinde birleştirilir (örtüşenler tekleşir, dışlananlar çıkarılır);
+    # isimler olduğu gibi tutulur, dışlama listesinde aynen geçen isim çıkarılır. -> (hedefler, dışlanan adres sayısı)
+    inc, exc = AddressSet(), AddressSet()
+    names: Dict[str, None] = {}
+    for spec in specs:
+        if not inc.add_spec(spec): names[spec] = None
+    drop = {spec for spec in exclude if not exc.add_spec(spec, whole=True)}
+    before = inc.count()
+    inc.subtract(exc)
+    kept = [n for n in names if n not in drop]
+    return kept + inc.specs(), before - inc.count() + len(names) - len(kept)
+
+def split_targets(targets: List[str], n: int, discovery: bool = True) -> List[List[str]]:
+    # host shard'ları: adres uzayı ardışık aralıklara bölünür, her süreç yalnızca kendi hostlarını üretir.
+    # Keşfe girecek ve girmeyecek hedefler ayrı bölünür (discovery davranışı korunur); isimler sırayla dağıtılır
+    out: List[List[str]] = [[] for _ in range(n)]
+    groups: Tuple[AddressSet, AddressSet] = (AddressSet(), AddressSet())
+    names = 0
+    for t in targets:
+        if _as_range(t) is None:
+            out[names % n].append(t); names += 1
+        else:
+            groups[discovery and is_sweep_target(t)].add_spec(t)
+    offset = names
+    for g in groups:
+        for k, part in enumerate(g.split(n, offset % n)): out[k] += part
+        offset += g.count()
+    return out
+
+def read_specs(path: str) -> Iterator[str]:
+    # hedef dosyası ("-" = stdin): satır başına bir ya da birkaç hedef (boşluk/virgülle ayrılmış), # yorum
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            yield from (t for t in re.split(r"[\s,]+", line.split("#", 1)[0]) if t)
+    finally:
+        if f is not sys.stdin: f.close()
+
+def target_matcher(targets: List[str]) -> Callable[[str], bool]:
+    # host, hedef listesinden birine (isim, CIDR veya aralık) dahil mi
+    names = set()
+    addrs = AddressSet()
+    for t in targets:
+        if not addrs.add_spec(t): names.add(t)
+    return lambda host: host in names or host in addrs
+
+def host_sort_key(host: str) -> Tuple[int, int, str]:
+    try:
+        ip = ipaddress.ip_address(host)
+        return (0, ip.version * (1 << 128) + int(ip), "")
+    except ValueError:
+        return (1, 0, host)
+
+class HostLimiter:
+    # host başına in-flight sınırı; semafor yalnızca hostun uçuşta işi varken yaşar
+    def __init__(self, cap: int) -> None:
+        self.cap = cap
+        self._sems: Dict[str, List[Any]] = {}   # host -> [Semaphore, users]
+
+    async def acquire(self, host: str) -> None:
+        if self.cap <= 0: return
+        ent = self._sems.get(host)
+        if ent is None:
+            ent = self._sems[host] = [asyncio.Semaphore(self.cap), 0]
+        ent[1] += 1
+        try:
+            await ent[0].acquire()
+        except BaseException:
+            self._drop(host, ent); raise
+
+    def release(self, host: str) -> None:
+        if self.cap <= 0: return
+        ent = self._sems[host]
+        ent[0].release()
+        self._drop(host, ent)
+
+    def _drop(self, host: str, ent: List[Any]) -> None:
+        ent[1] -= 1
+        if ent[1] == 0: del self._sems[host]
+
+class AdaptiveTimeouts:
+    # TCP retransmission timer (RFC 6298) benzeri: CLOSED/OPEN cevaplarından host başına SRTT/RTTVAR,
+    # timeout = SRTT + 4*RTTVAR, [floor, ceiling] aralığında. Örnek yokken başlangıç timeout'u kullanılır.
+    def __init__(self, initial: float, floor: float, ceiling: float) -> None:
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self._est: Dict[str, List[float]] = {}    # host -> [srtt, rttvar]
+
+    def timeout(self, host: str) -> float:
+        e = self._est.get(host)
+        if e is None: return self.initial
+        return min(self.ceiling, max(self.floor, e[0] + 4*e[1]))
+
+    def sample(self, host: str, rtt: float) -> None:
+        e = self._est.get(host)
+        if e is None:
+            self._est[host] = [rtt, rtt/2]
+        else:
+            e[1] = 0.75*e[1] + 0.25*abs(e[0] - rtt)
+            e[0] = 0.875*e[0] + 0.125*rtt
+
+class TokenBucket:
+    # rate token/sn, `burst` kapasiteli bucket. Token borçlanılabilir: her çağıran kendi sırasının
+    # gelmesini bekler (FIFO'ya yakın, çağrı başına O(1)).
+    def __init__(self, rate: float, burst: int = 0) -> None:
+        self.rate = rate
+        self.capacity = float(burst) if burst > 0 else max(1.0, rate / 10)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self) -> None:
+        self._refill()
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+class RateLimiter:
+    # global + host başına token bucket; connect ve banner (yeniden bağlanma) aşamaları ortak kullanır
+    MAX_IDLE_BUCKETS = 4096
+
+    def __init__(self, rate: float, host_rate: float, burst: int = 0) -> None:
+        self.glob = TokenBucket(rate, burst) if rate > 0 else None
+        self.host_rate = host_rate
+        self.burst = burst
+        self._hosts: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, host: str) -> None:
+        if self.host_rate > 0:
+            b = self._hosts.get(host)
+            if b is None:
+                if len(self._hosts) >= self.MAX_IDLE_BUCKETS:
+                    # dolmuş bucket'lar varsayılan durumla aynıdır, atılabilir
+                    self._hosts = {h: x for h, x in self._hosts.items() if not x.full()}
+                b = self._hosts[host] = TokenBucket(self.host_rate, self.burst)
+            await b.acquire()
+        if self.glob is not None:
+            await self.glob.acquire()
+
+def fd_budget(reserve: int = 64) -> int | None:
+    # RLIMIT_NOFILE soft limiti mümkünse hard limite çekilir; tarama için kalan fd sayısı döner
+    if resource is None: return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard != resource.RLIM_INFINITY else max(soft, 65536)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard)); soft = target
+        except (ValueError, OSError):
+            pass
+    if soft == resource.RLIM_INFINITY: return None
+    return max(1, soft - reserve)
+
+class AimdLimiter:
+    # TCP congestion control benzeri in-flight penceresi. Bir "tur" = pencere kadar tamamlanan probe.
+    # slow start: temiz turda pencere x2; sonrasında temiz turda +step; timeout sıçraması veya
+    # kaynak hatası (EMFILE/ENOBUFS...) görülünce x0.5 (turda en fazla bir kez).
+    OK, TIMEOUT, RESOURCE = 0, 1, 2
+
+    def __init__(self, maximum: int, initial: int = 32, minimum: int = 4) -> None:
+        self.max = max(1, maximum)
+        self.min = min(minimum, self.max)
+        self.window = float(min(max(initial, self.min), self.max))
+        self.ssthresh = float(self.max)
+        self.step = max(1.0, self.max / 32)
+        self.inflight = 0
+        self.cuts = 0
+        self._done = 0
+        self._timeouts = 0
+        self._cut_this_round = False
+        self._baseline: float | None = None   # temiz turlardaki timeout oranı (EWMA)
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self) -> None:
+        while self.inflight >= int(self.window):
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except BaseException:
+                if fut in self._waiters: self._waiters.remove(fut)
+                self._wake(); raise
+        self.inflight += 1
+
+    def release(self, outcome: int | None) -> None:
+        self.inflight -= 1
+        if outcome == self.RESOURCE:
+            self._cut()
+        elif outcome is not None:
+            self._done += 1
+            if outcome == self.TIMEOUT: self._timeouts += 1
+            if self._done >= int(self.window): self._end_round()
+        self._wake()
+
+    def _end_round(self) -> None:
+        ratio = self._timeouts / self._done
+        base = self._baseline
+        if base is not None and ratio > 2*base + 0.1:
+            self._cut()
+        else:
+            self._baseline = ratio if base is None else 0.8*base + 0.2*ratio
+            if not self._cut_this_round:
+                grow = self.window if self.window < self.ssthresh else self.step
+                self.window = min(float(self.max), self.window + grow)
+        self._done = self._timeouts = 0
+        self._cut_this_round = False
+
+    def _cut(self) -> None:
+        if self._cut_this_round: return
+        self._cut_this_round = True
+        self.cuts += 1
+        self.window = max(float(self.min), self.window / 2)
+        self.ssthresh = self.window
+
+    def _wake(self) -> None:
+        free = int(self.window) - self.inflight
+        while free > 0 and self._waiters:
+            fut = self._waiters.pop(0)
+            if not fut.done():
+                fut.set_result(None); free -= 1
+
+@functools.lru_cache(maxsize=65536)
+def _literal_family(host: str) -> int | None:
     try:
-        net = ipaddress.ip_network(target, strict=False)
-        return [str(h) for h in net.hosts()]
+        return socket.AF_INET6 if ipaddress.ip_address(host).version == 6 else socket.AF_INET
     except ValueError:
-        return [target]
+        return None
+
+class DnsCache:
+    # isim -> adres cache'i; getaddrinfo TTL döndürmediği için kayıtlar `ttl` sn saklanır.
+    # AF_UNSPEC ile A ve AAAA birlikte çözülür; aynı isim için eşzamanlı sorgular tek sorguda birleşir.
+    NEGATIVE_TTL = 30.0
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple[float, Any]] = {}     # host -> (expires, [(family, ip)] | (hata sınıfı, args))
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def resolve(self, host: str) -> List[Tuple[int, str]]:
+        ent = self._entries.get(host)
+        if ent is None:
+            fam = _literal_family(host)
+            if fam is not None: return [(fam, host)]
+        if ent and ent[0] > time.monotonic():
+            self.hits += 1
+            return self._unwrap(ent[1])
+        fut = self._pending.get(host)
+        if fut is not None:
+            self.hits += 1
+            return self._unwrap(await asyncio.shield(fut))
+        self.misses += 1
+        fut = self._pending[host] = asyncio.get_running_loop().create_future()
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            val: Any = list(dict.fromkeys((fam, sa[0]) for fam, _, _, _, sa in infos))
+            ttl = self.ttl
+        except OSError as e:
+            # istisna nesnesi değil (sınıf, args) saklanır: aynı nesneyi her probe'da yeniden fırlatmak
+            # __traceback__'ine çerçeve ekler ve biten probe'ların çerçevelerini canlı tutar
+            val, ttl = (type(e), e.args), min(self.ttl, self.NEGATIVE_TTL)
+        except BaseException:
+            del self._pending[host]; fut.cancel(); raise
+        self._entries[host] = (time.monotonic() + ttl, val)
+        del self._pending[host]
+        fut.set_result(val)
+        return self._unwrap(val)
+
+    async def address(self, host: str) -> Tuple[int, str]:
+        return (await self.resolve(host))[0]
+
+    @staticmethod
+    def _unwrap(val: Any) -> List[Tuple[int, str]]:
+        if isinstance(val, tuple): raise val[0](*val[1])
+        return val
+
+# errno -> port durumu (her iki engine de aynı eşlemeyi kullanır)
+_FILTERED_ERRNOS = {errno.ETIMEDOUT, errno.EHOSTUNREACH, errno.ENETUNREACH}
+_LINGER_RST = struct.pack("ii", 1, 0)
+_PACE_WORKERS, _PACE_WORKERS_MAX = 4, 4096   # jitter/rate beklerken slot dışı ek worker: slot başına, toplam üst sınır
+_RESOURCE_RETRIES = 5        # AIMD: kaynak hatasında (EMFILE ...) aynı probe'un en fazla yeniden deneme sayısı
+_RESOURCE_ERRNOS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM, errno.EADDRNOTAVAIL}
+_CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY}
+
+def _close_conn(conn: Any) -> None:
+    # stage 1'den gelen bağlantı: raw soket veya (reader, writer)
+    if conn is None: return
+    try:
+        if isinstance(conn, socket.socket): conn.close()
+        else: conn[1].close()
+    except Exception:
+        pass
+
+def _set_done(fut: asyncio.Future) -> None:
+    if not fut.done(): fut.set_result(None)
+
+def _set_timeout(fut: asyncio.Future) -> None:
+    if not fut.done(): fut.set_exception(asyncio.TimeoutError())
+
+def _state_for_oserror(e: OSError) -> str:
+    if isinstance(e, ConnectionRefusedError) or e.errno == errno.ECONNREFUSED:
+        return "CLOSED"
+    if e.errno in _FILTERED_ERRNOS:
+        return "FILTERED/TIMEOUT"
+    return f"ERROR ({e})"
+
+# ---------- TLS ----------
+TLS_PORTS = (443,8443,9443)
+
+class TlsClientContext(ssl.SSLContext):
+    # tarama başına tek client context (doğrulama yok, yalnızca envanter).
+    # wrap_bio aynı isme ait son oturumu verir -> sunucu destekliyorsa TLS session resumption
+    MAX_SESSIONS = 4096
+
+    def __new__(cls):
+        ctx = super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        ctx.sessions = {}
+        return ctx
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and server_hostname:
+            session = self.sessions.get(server_hostname)
+        try:
+            return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+        except ValueError:
+            return super().wrap_bio(incoming, outgoing, server_side, server_hostname)
+
+    def remember(self, server_hostname: str, session: ssl.SSLSession | None) -> None:
+        if session is None: return
+        self.sessions.pop(server_hostname, None)
+        if len(self.sessions) >= self.MAX_SESSIONS:
+            del self.sessions[next(iter(self.sessions))]
+        self.sessions[server_hostname] = session
+
+def _der_items(der: bytes, i: int = 0, end: int | None = None) -> Iterator[Tuple[int, int, int]]:
+    # minimal DER okuyucu: (tag, içerik başı, içerik sonu)
+    end = len(der) if end is None else end
+    while i < end:
+        tag, ln = der[i], der[i+1]; i += 2
+        if ln & 0x80:
+            n = ln & 0x7f; ln = int.from_bytes(der[i:i+n], "big"); i += n
+        yield tag, i, i+ln
+        i += ln
+
+def _der_cn(der: bytes, s: int, e: int) -> str:
+    for _, rs, re_ in _der_items(der, s, e):              # RDN SET
+        for _, as_, ae in _der_items(der, rs, re_):       # AttributeTypeAndValue
+            (_, os_, oe), (_, vs, ve) = list(_der_items(der, as_, ae))[:2]
+            if der[os_:oe] == b"\x55\x04\x03":            # 2.5.4.3 commonName
+                return der[vs:ve].decode("utf-8", "replace")
+    return ""
+
+def _der_time(der: bytes, tag: int, s: int, e: int) -> datetime.datetime:
+    txt = der[s:e].decode("ascii")
+    if tag == 0x17:    # UTCTime YYMMDDHHMMSSZ
+        yy = int(txt[:2]); txt = ("19" if yy >= 50 else "20") + txt
+    return datetime.datetime.strptime(txt[:14], "%Y%m%d%H%M%S")
+
+def cert_summary(der: bytes) -> str:
+    # CERT_NONE ile getpeercert() boş döner; özet DER'den çıkarılır
+    subj = iss = exp = ""
+    try:
+        _, s, e = next(_der_items(der))                   # Certificate
+        _, s, e = next(_der_items(der, s, e))             # TBSCertificate
+        items = list(_der_items(der, s, e))
+        if items[0][0] == 0xa0: items = items[1:]         # [0] version
+        _, iss_s, iss_e = items[2]
+        _, val_s, val_e = items[3]
+        _, sub_s, sub_e = items[4]
+        subj = _der_cn(der, sub_s, sub_e)
+        iss  = _der_cn(der, iss_s, iss_e)
+        tag, ns, ne = list(_der_items(der, val_s, val_e))[1]   # notAfter
+        exp = f"expires_in={(_der_time(der, tag, ns, ne) - datetime.datetime.utcnow()).days}d"
+    except Exception:
+        pass
+    return " | ".join(p for p in [f"CN={subj}" if subj else "", f"Issuer={iss}" if iss else "", exp] if p)
+
+# ---------- Service probes ----------
+@dataclass(frozen=True)
+class ServiceProbe:
+    name: str
+    payload: bytes                 # b"" = yalnızca dinle (banner'ı sunucu gönderir); {host} yer tutucusu doldurulur
+    ports: Tuple[int, ...] = ()    # bu portlarda önce ve tam enrich timeout'u ile denenir
+    fallback: bool = False         # tabloda olmayan portlarda (kısa bekleme ile) sırayla denenir
+    matches: Tuple[Tuple[str, bytes], ...] = ()   # (servis, bytes regex); tüm tablo tek bir eşleyicide birleşir
+    max_bytes: int = 512
+
+SERVICE_PROBES = (
+    ServiceProbe("null", b"", ports=(21, 22, 23, 25, 110, 143, 587, 2121, 3306, 5900), fallback=True, matches=(
+        ("ssh", rb"^SSH-\d+\.\d+-"),
+        ("ftp", rb"^220[- ][^\r\n]*(?i:ftp)"),
+        ("smtp", rb"^220[- ][^\r\n]*(?i:smtp|mail|postfix|exim|sendmail)"),
+        ("pop3", rb"^\+OK"),
+        ("imap", rb"^\* (?:OK|PREAUTH)"),
+        ("mysql", rb"^.{3}\x00\x0a\d+\.\d+"),
+        ("vnc", rb"^RFB \d{3}\.\d{3}"),
+        ("telnet", rb"^\xff[\xfb-\xfe]"))),
+    ServiceProbe("http", b"HEAD / HTTP/1.1\r\nHost: {host}\r\nUser-Agent: pyScan/0.3\r\nConnection: close\r\n\r\n",
+                 ports=(80, 81, 3000, 5000, 8000, 8008, 8080, 8081, 8181, 8880, 8888, 9000, 9090), fallback=True,
+                 matches=(("http", rb"^HTTP/\d\.\d \d{3}"),), max_bytes=400),
+    ServiceProbe("redis", b"*1\r\n$4\r\nPING\r\n", ports=(6379,),
+                 matches=(("redis", rb"^(?:\+PONG|-NOAUTH|-ERR|-DENIED)"),), max_bytes=120),
+    ServiceProbe("memcached", b"version\r\n", ports=(11211,), matches=(("memcached", rb"^VERSION "),), max_bytes=120),
+)
+FALLBACK_WAIT = 0.5                # tablo dışı portlarda her fallback probe'un en fazla beklemesi (sn)
+
+class ProbeTable:
+    # port -> probe indeksi, fallback listesi ve tüm imzalardan derlenmiş tek regex (isimli gruplar)
+    def __init__(self, probes: Iterable[ServiceProbe]) -> None:
+        self.probes = tuple(probes)
+        self.by_port: Dict[int, List[ServiceProbe]] = {}
+        for pr in self.probes:
+            for p in pr.ports: self.by_port.setdefault(p, []).append(pr)
+        self.fallback = [pr for pr in self.probes if pr.fallback]
+        parts: List[bytes] = []
+        self._service: Dict[str, str] = {}
+        for pr in self.probes:
+            for service, rx in pr.matches:
+                g = f"m{len(self._service)}"
+                self._service[g] = service
+                parts.append(b"(?P<%s>%s)" % (g.encode(), rx))
+        self._rx = re.compile(b"|".join(parts), re.S) if parts else None
+
+    def plan(self, port: int) -> List[Tuple[ServiceProbe, bool]]:
+        # (probe, port'a özel mi): önce porta özel probe'lar, sonra denenmemiş fallback'ler
+        own = self.by_port.get(port, [])
+        return [(pr, True) for pr in own] + [(pr, False) for pr in self.fallback if pr not in own]
+
+    def match(self, data: bytes) -> str:
+        # yanıt hangi probe'dan gelmiş olursa olsun tüm imzalar denenir (ör. 8080'de SSH)
+        m = self._rx.search(data) if self._rx is not None else None
+        return self._service[m.lastgroup] if m else ""
+
+PROBES = ProbeTable(SERVICE_PROBES)
+
+async def read_response(reader: asyncio.StreamReader, wait: float, max_bytes: int,
+                        table: ProbeTable = PROBES) -> Tuple[bytes, str, bool]:
+    # imza eşleşince, satır tamamlanınca, bağlantı kapanınca ya da max_bytes'ta durur; (veri, servis, eof)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    data = b""
+    while len(data) < max_bytes:
+        left = deadline - loop.time()
+        if left <= 0: break
+        try:
+            chunk = await asyncio.wait_for(reader.read(max_bytes - len(data)), timeout=left)
+        except asyncio.TimeoutError:
+            break
+        if not chunk: return data, table.match(data), True
+        data += chunk
+        service = table.match(data)
+        if service: return data, service, False
+        if data.endswith(b"\n"): break
+    return data, "", False
+
+# ---------- Metrics ----------
+CONNECT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)   # sn
+_STATE_LABELS = {"OPEN": "open", "CLOSED": "closed", "FILTERED/TIMEOUT": "filtered"}
+
+class ScanMetrics:
+    # sayaçlar / zamanlayıcılar; event loop'ta güncellenir, ilerleme satırı ve /metrics ayrı thread'den okur
+    # (tek tek int/float okumaları GIL altında tutarlı; satırlar arası küçük kaymalar önemsiz)
+    def __init__(self) -> None:
+        self.t0 = time.monotonic()
+        self.phase = "scan"
+        self.phase_t0 = self.t0
+        self.total: int | None = None      # bu aşamadaki tahmini iş
+        self.phase_done = 0
+        self.started = 0
+        self.finished = {"open": 0, "closed": 0, "filtered": 0, "error": 0}
+        self.inflight = 0                  # connect aşamasındaki probe'lar
+        self.enriching = 0                 # banner/TLS aşamasındakiler
+        self.enrich_queued = 0
+        self.wait = {"pace": 0.0, "slot": 0.0, "enrich_queue": 0.0}   # toplam bekleme (sn)
+        self.hist = [0] * (len(CONNECT_BUCKETS) + 1)
+        self.connect_sum = 0.0
+        self.connects = 0
+        self.stage = {"banner": [0, 0.0], "tls": [0, 0.0]}         # [adet, toplam sn]
+        self._mark = (self.t0, 0)          # ilerleme satırındaki anlık hız için
+        self.cc: "AimdLimiter | None" = None   # --adaptive-concurrency: pencere canlı okunur
+
+    def begin(self, phase: str, total: int | None) -> None:
+        self.phase, self.total, self.phase_done = phase, total, 0
+        self.phase_t0 = time.monotonic()
+
+    def probed(self, pace: float, slot: float, connect: float) -> None:
+        self.wait["pace"] += pace; self.wait["slot"] += slot
+        self.hist[bisect.bisect_left(CONNECT_BUCKETS, connect)] += 1
+        self.connect_sum += connect; self.connects += 1
+
+    def result(self, state: str) -> None:
+        self.finished[_STATE_LABELS.get(state, "error")] += 1
+        self.phase_done += 1
+
+    def eta(self) -> float | None:
+        if not self.total or not self.phase_done: return None
+        rate = self.phase_done / max(1e-6, time.monotonic() - self.phase_t0)
+        return max(0.0, (self.total - self.phase_done) / rate)
+
+    def progress_line(self) -> str:
+        now = time.monotonic()
+        t, n = self._mark
+        done = sum(self.finished.values())
+        rate = (done - n) / max(1e-6, now - t)
+        self._mark = (now, done)
+        total = f"/{self.total:,} ({100 * self.phase_done / self.total:.1f}%)" if self.total else ""
+        eta = self.eta()
+        f = self.finished
+        return (f"[~] {self.phase} {self.phase_done:,}{total} {rate:,.0f}/s open={f['open']} closed={f['closed']:,}"
+                f" filtered={f['filtered']:,} err={f['error']} inflight={self.inflight}"
+                f" enrich={self.enriching}+{self.enrich_queued}q slot_wait={self.wait['slot']:.1f}s"
+                + (f" window={int(self.cc.window)}/{self.cc.max} cuts={self.cc.cuts}" if self.cc is not None else "")
+                + (f" eta {datetime.timedelta(seconds=int(eta))}" if eta is not None else ""))
+
+    def prometheus(self) -> str:
+        out = ["# HELP pyscan_probes_started_total Connect probes started",
+               "# TYPE pyscan_probes_started_total counter", f"pyscan_probes_started_total {self.started}",
+               "# HELP pyscan_probes_finished_total Results emitted, by state",
+               "# TYPE pyscan_probes_finished_total counter"]
+        out += [f'pyscan_probes_finished_total{{state="{k}"}} {v}' for k, v in self.finished.items()]
+        out += ["# HELP pyscan_inflight Probes currently in a stage", "# TYPE pyscan_inflight gauge",
+                f'pyscan_inflight{{stage="connect"}} {self.inflight}', f'pyscan_inflight{{stage="enrich"}} {self.enriching}',
+                f'pyscan_inflight{{stage="enrich_queue"}} {self.enrich_queued}',
+                "# HELP pyscan_wait_seconds_total Time probes spent waiting (pace = jitter/rate limit, slot = host/AIMD cap)",
+                "# TYPE pyscan_wait_seconds_total counter"]
+        out += [f'pyscan_wait_seconds_total{{kind="{k}"}} {v:.6f}' for k, v in self.wait.items()]
+        out += ["# HELP pyscan_connect_seconds Connect phase duration (including retries)",
+                "# TYPE pyscan_connect_seconds histogram"]
+        acc = 0
+        for le, n in zip(CONNECT_BUCKETS + (None,), self.hist):
+            acc += n
+            out.append(f'pyscan_connect_seconds_bucket{{le="{"+Inf" if le is None else le}"}} {acc}')
+        out += [f"pyscan_connect_seconds_sum {self.connect_sum:.6f}", f"pyscan_connect_seconds_count {self.connects}",
+                "# HELP pyscan_stage_seconds_total Time spent in banner / TLS collection",
+                "# TYPE pyscan_stage_seconds_total counter"]
+        out += [f'pyscan_stage_seconds_total{{stage="{k}"}} {v[1]:.6f}' for k, v in self.stage.items()]
+        out += ["# TYPE pyscan_stage_total counter"] + [f'pyscan_stage_total{{stage="{k}"}} {v[0]}' for k, v in self.stage.items()]
+        eta = self.eta()
+        out += ["# HELP pyscan_phase_work Estimated and finished work in the current phase",
+                "# TYPE pyscan_phase_work gauge",
+                f'pyscan_phase_work{{phase="{self.phase}",kind="total"}} {self.total or 0}',
+                f'pyscan_phase_work{{phase="{self.phase}",kind="done"}} {self.phase_done}',
+                "# TYPE pyscan_eta_seconds gauge", f"pyscan_eta_seconds {eta if eta is not None else 'NaN'}",
+                "# TYPE pyscan_uptime_seconds gauge", f"pyscan_uptime_seconds {time.monotonic() - self.t0:.3f}"]
+        if self.cc is not None:
+            out += ["# HELP pyscan_aimd_window AIMD in-flight window (--adaptive-concurrency)", "# TYPE pyscan_aimd_window gauge",
+                    f'pyscan_aimd_window{{kind="current"}} {self.cc.window:.1f}', f'pyscan_aimd_window{{kind="max"}} {self.cc.max}',
+                    "# HELP pyscan_aimd_cuts_total Multiplicative window decreases", "# TYPE pyscan_aimd_cuts_total counter",
+                    f"pyscan_aimd_cuts_total {self.cc.cuts}"]
+        return "\n".join(out) + "\n"
+
+class ProgressReporter(threading.Thread):
+    # her `every` sn'de bir stderr'e ilerleme satırı
+    def __init__(self, metrics: ScanMetrics, every: float) -> None:
+        super().__init__(daemon=True)
+        self.metrics, self.every = metrics, every
+        self._stop = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop.wait(self.every):
+            print(self.metrics.progress_line(), file=sys.stderr, flush=True)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+def start_metrics_server(metrics: ScanMetrics, port: int) -> http.server.ThreadingHTTPServer:
+    # yalnızca localhost; Prometheus metin formatı (/metrics)
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404); return
+            body = metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args: Any) -> None:
+            pass
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
 
 # ---------- Scanner ----------
 class AsyncPortScanner:
-    def __init__(self, cfg: ScanConfig) -> None:
+    def __init__(self, cfg: ScanConfig, done: PortCoverage | None = None,
+                 trace: Callable[[Dict[str, Any]], None] | None = None) -> None:
         self.cfg = cfg
-        self._sem = asyncio.Semaphore(cfg.concurrency)
+        self.done = done            # önceki çalıştırmada tamamlanmış (host, port) çiftleri (resume)
+        self.metrics = ScanMetrics()
+        self.trace = trace          # opt-in: her probe için aşama süreleri (ms) ile çağrılır
+        self.deadline: float | None = None            # time.monotonic() tabanlı bitiş (max_duration)
+        self.cut = False                              # deadline'da iş yarıda kesildi
+        self.shed_retries = self.shed_enrich = False  # deadline yaklaşırken bırakılan düşük öncelikli işler
+        self.uncovered = UncoveredWork()
+        self._open: set | None = None                 # deadline varken: kuyruğa girmiş ama bitmemiş çiftler
+        self._hosts = HostLimiter(cfg.host_concurrency)
+        self.dns = DnsCache(cfg.dns_ttl)
+        self.discovered: Tuple[int, int] | None = None    # (canlı, denenen) host sayısı
+        self._enrich_q: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None      # ek worker varken connect slotları
+        # fd limiti: connect slotları + stage 2 havuzu + stage 2'yi bekleyen bağlantılar
+        # limit darsa stage 2'ye en fazla çeyreği ayrılır
+        budget = fd_budget()
+        self.enrich_workers, self.enrich_backlog = cfg.enrich_concurrency, cfg.enrich_backlog
+        if budget is None:
+            self.max_inflight = cfg.concurrency
+        else:
+            stage2 = min(cfg.enrich_concurrency + cfg.enrich_backlog, budget // 4) if cfg.enrich else 0
+            self.enrich_workers = max(1, min(cfg.enrich_concurrency, stage2))
+            self.enrich_backlog = max(0, min(cfg.enrich_backlog, stage2 - self.enrich_workers))
+            self.max_inflight = max(1, min(cfg.concurrency, budget - stage2))
+        self.cc = AimdLimiter(self.max_inflight) if cfg.adaptive_concurrency else None
+        self.metrics.cc = self.cc
+        self.rate = RateLimiter(cfg.rate, cfg.host_rate, cfg.burst) if (cfg.rate > 0 or cfg.host_rate > 0) else None
+        self.rtt = AdaptiveTimeouts(cfg.timeout, cfg.min_timeout, cfg.max_timeout) if cfg.adaptive_timeout else None
+        self._tls_ctx = TlsClientContext()
+        self._cert_cache: Dict[bytes, str] = {}     # sha256(DER) -> özet; aynı sertifikalı fleet'te tek parse
+        self.tls_handshakes = 0
+        self.tls_resumed = 0
+        self.cert_cache_hits = 0
 
     async def scan_all(self) -> List[PortResult]:
         results: List[PortResult] = []
-        for host in self.cfg.targets:
-            host_results = await self._scan_host(host)
-            results.extend(host_results)
-        return results
+        await self.scan(results.append)
+        return sorted(results, key=lambda r: (host_sort_key(r.host), r.port))
+
+    def _start_clock(self) -> None:
+        if self.cfg.max_duration > 0 and self.deadline is None:
+            self.deadline = time.monotonic() + self.cfg.max_duration
+
+    async def scan(self, emit: Callable[[PortResult], None]) -> None:
+        self._start_clock()
+        ports = rank_ports(self.cfg.ports)
+        if self._by_port(): ports = ports[self.cfg.shard::self.cfg.shards]
+        if self.cut:                  # diff modunda recheck turu deadline'ı tüketti
+            self.uncovered.block(self.cfg.targets, ports); return
+        # isimler probe'lardan önce bir kez çözülür; sonraki tüm probe'lar cache'i kullanır
+        names = [t for t in self.cfg.targets if _as_range(t) is None]
+        await asyncio.gather(*(self.dns.resolve(n) for n in names), return_exceptions=True)
+        sweep: List[str] = []; direct: List[str] = []
+        for t in self.cfg.targets:
+            (sweep if self.cfg.discovery and is_sweep_target(t) else direct).append(t)
+        live: List[str] = []
+        done = self.done
+        if sweep:
+            # discovery: her adrese birkaç port; OPEN ya da CLOSED (RST) cevabı host'un canlı olduğunu gösterir.
+            # resume'da journal'da işi olan hostlar zaten canlı bulunmuş hostlardır
+            seen: set = set()
+            if done:
+                in_sweep = target_matcher(sweep)
+                for h in done.hosts():
+                    if h not in seen and in_sweep(h):
+                        seen.add(h); live.append(h)
+            def on_reply(r: PortResult) -> None:
+                if r.state in ("OPEN", "CLOSED") and r.host not in seen:
+                    seen.add(r.host); live.append(r.host)
+            fresh = lambda: (h for h in iter_hosts(sweep) if h not in seen)
+            self.metrics.begin("discovery", count_hosts(sweep) * len(self.cfg.discovery_ports))
+            await self._run(iter_work(fresh, self.cfg.discovery_ports), on_reply, enrich=False, report=False)
+            if self.cut:
+                self.uncovered.block(self.cfg.targets, ports); return
+            live.sort(key=host_sort_key)
+            self.discovered = (len(live), count_hosts(sweep))
+        def hosts() -> Iterator[str]:
+            yield from iter_hosts(direct)
+            yield from live
+        pos = [0, 0]                  # deadline için: (port sırası, o port için üretilen host sayısı)
+        def tracked() -> Iterator[Tuple[str, int]]:
+            for i, p in enumerate(ports):
+                pos[0], pos[1] = i, 0
+                for h in hosts():
+                    pos[1] += 1
+                    yield h, p
+        work = tracked() if self.deadline is not None else iter_work(hosts, ports)
+        if done:
+            work = ((h, p) for h, p in work if not done.contains(h, p))
+        n = count_hosts(direct) + len(live)
+        skip = done.count() if done else 0
+        if done and self.cfg.shards > 1:          # resume kaydı tüm alanı kapsar; yalnızca bu shard'ınki düşülür
+            own = target_matcher(self.cfg.targets)
+            skip = sum(b - a + 1 for h in done.hosts() if own(h) for a, b in done.intervals(h))
+        self.metrics.begin("scan", max(0, n * len(ports) - skip))
+        await self._run(work, emit, enrich=self.cfg.enrich)
+        if self.cut:
+            # kuyruğa hiç girmemiş iş, üretecin konumundan hesaplanır (kalanı tek tek açılmaz)
+            i, k = pos
+            self.uncovered.block(list(itertools.islice(hosts(), k, None)), ports[i:i + 1])
+            if i + 1 < len(ports):
+                self.uncovered.block(direct + live, ports[i + 1:])
 
-    async def _scan_host(self, host: str) -> List[PortResult]:
-        tasks = [asyncio.create_task(self._guarded_probe(host, p)) for p in self.cfg.ports]
-        return sorted(await asyncio.gather(*tasks), key=lambda r: r.port)
+    def _by_port(self) -> bool:
+        return self.cfg.shards > 1 and self.cfg.shard_by == "port"
 
-    async def _guarded_probe(self, host: str, port: int) -> PortResult:
-        async with self._sem:
-            return await self._probe_tcp(host, port)
+    def stats(self) -> Dict[str, Any]:
+        return {"window": int(self.cc.window) if self.cc else None, "max_window": self.cc.max if self.cc else None,
+                "cuts": self.cc.cuts if self.cc else 0, "max_inflight": self.max_inflight,
+                "dns_hits": self.dns.hits, "dns_misses": self.dns.misses,
+                "tls_handshakes": self.tls_handshakes, "tls_resumed": self.tls_resumed,
+                "cert_cache_hits": self.cert_cache_hits, "discovered": self.discovered,
+                "uncovered": self.uncovered.to_dict() if self.cut else None}
+
+    async def scan_pairs(self, work: Iterable[Tuple[str, int]], emit: Callable[[PortResult], None]) -> None:
+        # hazır (host, port) listesini tarar (discovery yok), ör. diff modunda bilinen açık portlar
+        pairs = list(work)
+        names = {h for h, _ in pairs if _as_network(h) is None}
+        await asyncio.gather(*(self.dns.resolve(n) for n in names), return_exceptions=True)
+        self._start_clock()
+        self.metrics.begin("recheck", len(pairs))
+        it = iter(pairs)
+        await self._run(it, emit, enrich=self.cfg.enrich)
+        if self.cut:
+            for h, p in it: self.uncovered.add(h, p)
+
+    async def _run(self, work: Iterable[Tuple[str, int]], emit: Callable[[PortResult], None], enrich: bool,
+                   report: bool = True) -> None:
+        # stage 1: lazy producer -> bounded queue -> `concurrency` connect worker (bellek O(concurrency))
+        # stage 2: açık portlar ayrı kuyruğa düşer; banner/TLS kendi havuzu ve timeout'uyla toplanır,
+        #          böylece sessiz bir servis connect slotunu meşgul etmez
+        # deadline: tüm görevler iptal edilir; bekleyen/yarım banner'lı OPEN sonuçlar banner'sız yazılır,
+        #           başlamış ama bitmemiş çiftler (report ise) uncovered'a eklenir
+        if self.cut: return
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_inflight)
+        # stage 2 kuyruğu sınırlı: doluysa stage 1 bekler (her portu açık gösteren tarpit'te bellek O(havuz) kalır)
+        self._enrich_q = asyncio.Queue(maxsize=self.enrich_workers + self.enrich_backlog) if enrich else None
+        self._held = 0
+        track = self._open = set() if self.deadline is not None else None
+        # jitter/rate ve host sınırı beklemesi connect slotu dışında yapılır: bekleyen probe'lar için ek worker
+        # açılır, connect ise max_inflight slotla (AIMD varsa pencereyle) sınırlanır
+        paced = self._paced()
+        self._slots = asyncio.Semaphore(self.max_inflight) if paced and self.cc is None else None
+        n = self.max_inflight + (min(self.max_inflight * _PACE_WORKERS, _PACE_WORKERS_MAX) if paced else 0)
+        workers = [asyncio.create_task(self._worker(queue, emit)) for _ in range(n)]
+        enrichers = [asyncio.create_task(self._enrich_worker(emit))
+                     for _ in range(self.enrich_workers if enrich else 0)]
+        async def produce() -> None:
+            for item in work:
+                if track is not None: track.add(item)
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+        producer = asyncio.create_task(produce())
+        async def close() -> None:
+            # stage 1 bitince enricher'lara bitiş işareti; kuyruk doluysa put bekler, deadline bu görevi de keser
+            await asyncio.gather(producer, *workers)
+            for _ in enrichers:
+                await self._enrich_q.put(None)
+        closer = asyncio.create_task(close())
+        tasks = [producer, *workers, closer, *enrichers]
+        watch = asyncio.create_task(self._watch_deadline(tasks)) if self.deadline is not None else None
+        try:
+            try:
+                await asyncio.gather(closer, *enrichers)
+            except asyncio.CancelledError:
+                if not self.cut: raise
+        finally:
+            if watch is not None: watch.cancel()
+            for w in tasks: w.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            while self._enrich_q is not None and not self._enrich_q.empty():
+                item = self._enrich_q.get_nowait()
+                if item is None: continue
+                _close_conn(item[1])
+                if self.cut: self._finish(item[0], item[2], item[3], emit)
+            self.metrics.enrich_queued = 0
+            if track is not None and self.cut and report:
+                for h, p in track: self.uncovered.add(h, p)
+            self._open = None
+
+    async def _watch_deadline(self, tasks: List[asyncio.Task]) -> None:
+        # kalan iş gözlenen hızdan tahmin edilir; deadline'a yetişmeyecekse önce retry'lar, sonra banner
+        # toplama bırakılır (öncelikli portlar zaten önce tarandığından kalan iş en düşük değerli olandır)
+        m = self.metrics
+        while True:
+            left = self.deadline - time.monotonic()
+            if left <= 0: break
+            eta = m.eta() if m.phase_done >= 50 else None
+            late = eta is not None and eta > left
+            if late and not self.shed_retries and self.cfg.retries:
+                self.shed_retries = True
+                print(f"[!] deadline: ~{eta:.0f}s of work for {left:.0f}s left; dropping retries", file=sys.stderr)
+            if (late or left < 2 * self._enrich_timeout) and not self.shed_enrich and self._enrich_q is not None:
+                self.shed_enrich = True
+                print(f"[!] deadline: {left:.0f}s left; skipping banner/TLS on newly open ports", file=sys.stderr)
+            await asyncio.sleep(min(0.5, left))
+        self.cut = True
+        for t in tasks: t.cancel()
+
+    def _finish(self, result: PortResult, t0: float, ph: Dict[str, Any] | None, emit: Callable[[PortResult], None]) -> None:
+        self.metrics.result(result.state)
+        if self._open is not None: self._open.discard((result.host, result.port))
+        if ph is not None:
+            self.trace({"phase": self.metrics.phase, "host": result.host, "port": result.port, "state": result.state, **ph,
+                        "total_ms": round((time.perf_counter() - t0) * 1000, 3)})
+        emit(result)
+
+    async def _worker(self, queue: asyncio.Queue, emit: Callable[[PortResult], None]) -> None:
+        while True:
+            item = await queue.get()
+            if item is None: return
+            ph = {} if self.trace is not None else None
+            t0 = time.perf_counter()
+            result, conn = await self._guarded_probe(*item, ph)
+            if result.state != "OPEN" or self._enrich_q is None or self.shed_enrich:
+                _close_conn(conn)
+                self._finish(result, t0, ph, emit); continue
+            # bağlantı stage 2'ye devredilir; çok fazla bağlantı bekliyorsa kapatılır ve stage 2 yeniden bağlanır
+            if conn is not None and self._held >= self.enrich_backlog:
+                _close_conn(conn); conn = None
+            if conn is not None: self._held += 1
+            self.metrics.enrich_queued += 1
+            try:
+                await self._enrich_q.put((result, conn, t0, ph, time.perf_counter()))
+            except asyncio.CancelledError:
+                # deadline: kuyruğa giremeyen çift uncovered'da kalır, bağlantı kapatılır
+                if conn is not None: self._held -= 1
+                self.metrics.enrich_queued -= 1
+                _close_conn(conn); raise
+
+    def _paced(self) -> bool:
+        return self.rate is not None or self.cfg.jitter > 0 or self._hosts.cap > 0
+
+    async def _pace(self, host: str) -> None:
+        # jitter ve rate limit slot alınmadan önce beklenir; bekleyen probe bağlantı slotu tutmaz (_run'daki ek worker'lar)
+        if self.cfg.jitter > 0:
+            await asyncio.sleep(random.uniform(0.0, self.cfg.jitter))
+        if self.rate is not None:
+            await self.rate.acquire(host)
+
+    async def _guarded_probe(self, host: str, port: int, ph: Dict[str, Any] | None = None) -> Tuple[PortResult, Any]:
+        m = self.metrics
+        perf = time.perf_counter
+        t0 = perf()
+        if self.rate is not None or self.cfg.jitter > 0:
+            await self._pace(host)
+        t1 = perf()
+        await self._hosts.acquire(host)
+        slots = self._slots
+        if slots is not None:
+            try:
+                await slots.acquire()
+            except BaseException:
+                self._hosts.release(host); raise
+        try:
+            tries = 0
+            while True:
+                if self.cc is not None: await self.cc.acquire()
+                t2 = perf()
+                m.started += 1; m.inflight += 1
+                try:
+                    result, conn = await self._probe_tcp(host, port)
+                except OSError as e:
+                    m.inflight -= 1
+                    if self.cc is None: raise
+                    # kaynak hatası: pencere daralır, probe birkaç kez tekrar denenir; kalıcıysa ERROR raporlanır
+                    self.cc.release(AimdLimiter.RESOURCE)
+                    tries += 1
+                    if tries <= _RESOURCE_RETRIES:
+                        await asyncio.sleep(0.05 * tries)
+                        continue
+                    result, conn = PortResult(host, port, f"ERROR ({e})"), None
+                except BaseException:
+                    m.inflight -= 1
+                    if self.cc is not None: self.cc.release(None)
+                    raise
+                else:
+                    m.inflight -= 1
+                    if self.cc is not None:
+                        self.cc.release(AimdLimiter.TIMEOUT if result.state == "FILTERED/TIMEOUT" else AimdLimiter.OK)
+                t3 = perf()
+                # t0-t1: jitter/rate limit, t1-t2: host/connect slotu, t2-t3: connect (yeniden denemeler dahil)
+                m.probed(t1 - t0, t2 - t1, t3 - t2)
+                if ph is not None:
+                    ph.update(pace_ms=round((t1 - t0) * 1000, 3), slot_ms=round((t2 - t1) * 1000, 3),
+                              connect_ms=round((t3 - t2) * 1000, 3))
+                return result, conn
+        finally:
+            if slots is not None: slots.release()
+            self._hosts.release(host)
 
-    async def _probe_tcp(self, host: str, port: int) -> PortResult:
+    async def _probe_tcp(self, host: str, port: int) -> Tuple[PortResult, Any]:
+        # yalnızca connect: (sonuç, açık bağlantı | None) döner; banner/TLS stage 2'de
         start = time.perf_counter()
         attempt = 0
         last_state = "CLOSED"
-        banner = ""
-        while attempt <= self.cfg.retries:
-            if self.cfg.jitter > 0:
-                await asyncio.sleep(random.uniform(0.0, self.cfg.jitter))
+        conn: Any = None
+        keep = self._enrich_q is not None
+        timeout = self.cfg.timeout
+        while attempt <= (0 if self.shed_retries else self.cfg.retries):
+            if attempt > 0 and self.rate is not None:
+                await self.rate.acquire(host)     # ilk denemenin token'ı _pace'te alındı
+            if self.rtt is not None:
+                # her yeniden denemede timeout ikiye katlanır (tavanı aşmadan)
+                timeout = min(self.rtt.ceiling, self.rtt.timeout(host) * (2 ** attempt))
+            t0 = None
             try:
-                reader, writer = await asyncio.wait_for(
-                    asyncio.open_connection(host, port),
-                    timeout=self.cfg.timeout
-                )
-                last_state = "OPEN"
-                if port in (443,8443,9443):
-                    banner = await self._tls_info(host, port)
+                family, addr = await self.dns.address(host)
+                t0 = time.perf_counter()
+                if self.cfg.engine == "socket":
+                    conn = await self._connect_socket(family, addr, port, keep, timeout)
                 else:
-                    banner = await self._grab_banner(reader, writer, host, port)
-                try:
-                    writer.close(); await writer.wait_closed()
-                except Exception:
-                    pass
+                    conn = await asyncio.wait_for(asyncio.open_connection(addr, port), timeout=timeout)
+                last_state = "OPEN"
                 break
             except asyncio.TimeoutError:
                 last_state = "FILTERED/TIMEOUT"
-            except ConnectionRefusedError:
-                last_state = "CLOSED"; break
             except OSError as e:
-                last_state = f"ERROR ({e})"; break
+                if self.cc is not None and e.errno in _RESOURCE_ERRNOS: raise
+                last_state = _state_for_oserror(e)
+                if last_state != "FILTERED/TIMEOUT": break
             except Exception as e:
                 last_state = f"ERROR ({e})"; break
+            finally:
+                if self.rtt is not None and t0 is not None and last_state in ("OPEN", "CLOSED"):
+                    self.rtt.sample(host, time.perf_counter() - t0)
             attempt += 1
 
         latency = int((time.perf_counter()-start)*1000)
-        return PortResult(host, port, last_state, banner.strip(), latency)
-
-    async def _grab_banner(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int) -> str:
-        try:
-            if port in (80,8080,8000,8888):
-                req = f"HEAD / HTTP/1.1\r\nHost: {host}\r\nUser-Agent: pyScan/0.3\r\nConnection: close\r\n\r\n"
-                writer.write(req.encode()); await writer.drain()
-                data = await asyncio.wait_for(reader.read(400), timeout=self.cfg.timeout)
-                return data.decode(errors="ignore")
-            if port in (25,587):
-                writer.write(b"EHLO example.com\r\n"); await writer.drain()
-                data = await asyncio.wait_for(reader.read(200), timeout=self.cfg.timeout)
-                return data.decode(errors="ignore")
-            if port == 6379:
-                writer.write(b"*1\r\n$4\r\nPING\r\n"); await writer.drain()
-                data = await asyncio.wait_for(reader.read(120), timeout=self.cfg.timeout)
-                return data.decode(errors="ignore")
-            if port in (21,22,3306,27017):
-                data = await asyncio.wait_for(reader.read(260), timeout=self.cfg.timeout)
-                return data.decode(errors="ignore")
-        except Exception:
-            pass
-        return ""
+        return PortResult(host, port, last_state, "", latency,
+                          int(timeout*1000) if self.rtt is not None else None), conn
 
-    async def _tls_info(self, host: str, port: int) -> str:
-        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
+    async def _connect_socket(self, family: int, addr: str, port: int, keep: bool = False,
+                              timeout: float | None = None) -> socket.socket | None:
+        # stream/protocol/task kurmadan non-blocking connect + writable bekleme; sonuç SO_ERROR'dan okunur.
+        # keep=False ise açılan soket RST ile hemen kapanır (TIME_WAIT birikmez)
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(family, socket.SOCK_STREAM)
         try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(host, port, ssl=ctx, server_hostname=host),
-                timeout=self.cfg.timeout
-            )
-            ss = writer.get_extra_info("ssl_object")
-            cert = ss.getpeercert() if ss else None
-            ver = ss.version() if ss else ""
+            sock.setblocking(False)
+            err = sock.connect_ex((addr, port))
+            if err in _CONNECT_PENDING:
+                fd = sock.fileno()
+                fut = loop.create_future()
+                loop.add_writer(fd, _set_done, fut)
+                timer = loop.call_later(self.cfg.timeout if timeout is None else timeout, _set_timeout, fut)
+                try:
+                    await fut
+                finally:
+                    loop.remove_writer(fd); timer.cancel()
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if err:
+                raise OSError(err, os.strerror(err))
+            if keep:
+                conn, sock = sock, None
+                return conn
+            try: sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+            except OSError: pass
+            return None
+        finally:
+            if sock is not None: sock.close()
+
+    async def _enrich_worker(self, emit: Callable[[PortResult], None]) -> None:
+        while True:
+            item = await self._enrich_q.get()
+            if item is None: return
+            result, conn, t0, ph, queued = item
+            if conn is not None: self._held -= 1
+            m = self.metrics
+            t = time.perf_counter()
+            m.enrich_queued -= 1; m.enriching += 1; m.wait["enrich_queue"] += t - queued
             try:
-                writer.close(); await writer.wait_closed()
-            except Exception:
-                pass
-            subj = iss = exp = ""
-            if cert:
+                banner, result.service = await self._enrich(result.host, result.port, conn)
+                result.banner = banner.strip()
+            except asyncio.CancelledError:
+                self._finish(result, t0, ph, emit); raise       # deadline: port açık, banner'sız yazılır
+            finally:
+                m.enriching -= 1
+            dt = time.perf_counter() - t
+            stage = m.stage["tls" if result.port in TLS_PORTS else "banner"]
+            stage[0] += 1; stage[1] += dt
+            if ph is not None:
+                ph.update(queue_ms=round((t - queued) * 1000, 3))
+                ph["tls_ms" if result.port in TLS_PORTS else "banner_ms"] = round(dt * 1000, 3)
+            self._finish(result, t0, ph, emit)
+
+    async def _enrich(self, host: str, port: int, conn: Any) -> Tuple[str, str]:
+        # (banner, servis)
+        timeout = self._enrich_timeout
+        writer = None
+        try:
+            _, addr = await self.dns.address(host)
+            if conn is None:
+                if self.rate is not None: await self.rate.acquire(host)
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(addr, port), timeout=timeout)
+            elif isinstance(conn, socket.socket):
+                reader, writer = await asyncio.open_connection(sock=conn)
+            else:
+                reader, writer = conn
+            if port in TLS_PORTS:
+                info = await self._tls_info(host, writer)
+                return info, "ssl" if info else ""
+            return await self._grab_banner(reader, writer, host, port)
+        except Exception:
+            if writer is None: _close_conn(conn)
+            return "", ""
+        finally:
+            if writer is not None:
                 try:
-                    subj = dict(x[0] for x in cert.get("subject",())).get("commonName","")
-                    iss  = dict(x[0] for x in cert.get("issuer", ())).get("commonName","")
-                    na   = cert.get("notAfter")
-                    if na:
-                        dt = datetime.datetime.strptime(na, "%b %d %H:%M:%S %Y %Z")
-                        exp = f"expires_in={(dt - datetime.datetime.utcnow()).days}d"
+                    writer.close(); await writer.wait_closed()
                 except Exception:
                     pass
-            parts = [p for p in [f"TLS={ver}" if ver else "", f"CN={subj}" if subj else "", f"Issuer={iss}" if iss else "", exp] if p]
-            return " | ".join(parts)
+
+    @property
+    def _enrich_timeout(self) -> float:
+        return self.cfg.enrich_timeout if self.cfg.enrich_timeout is not None else self.cfg.timeout
+
+    async def _grab_banner(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int) -> Tuple[str, str]:
+        # probe tablosu: porta özel probe'lar tam timeout ile, fallback'ler kısa beklemeyle; ilk yanıtta durulur
+        full = self._enrich_timeout
+        short = min(full, FALLBACK_WAIT)
+        data = b""
+        try:
+            for probe, own in PROBES.plan(port):
+                if probe.payload:
+                    writer.write(probe.payload.replace(b"{host}", host.encode())); await writer.drain()
+                data, service, eof = await read_response(reader, full if own else short, probe.max_bytes)
+                if data or eof:
+                    return data.decode(errors="ignore"), service
         except Exception:
-            return ""
+            pass
+        return data.decode(errors="ignore"), ""
+
+    async def _tls_info(self, host: str, writer: asyncio.StreamWriter) -> str:
+        # mevcut düz bağlantı yerinde TLS'e yükseltilir (ikinci connect yok)
+        loop = asyncio.get_running_loop()
+        transport = writer.transport
+        tls = await asyncio.wait_for(
+            loop.start_tls(transport, transport.get_protocol(), self._tls_ctx, server_hostname=host),
+            timeout=self._enrich_timeout
+        )
+        try:
+            ss = tls.get_extra_info("ssl_object")
+            if ss is None: return ""
+            self.tls_handshakes += 1
+            if ss.session_reused: self.tls_resumed += 1
+            ver = ss.version() or ""
+            der = ss.getpeercert(binary_form=True)
+            cert = ""
+            if der:
+                fp = hashlib.sha256(der).digest()
+                cert = self._cert_cache.get(fp)
+                if cert is None:
+                    cert = self._cert_cache[fp] = cert_summary(der)
+                else:
+                    self.cert_cache_hits += 1
+            self._tls_ctx.remember(host, ss.session)
+            return " | ".join(p for p in [f"TLS={ver}" if ver else "", cert] if p)
+        finally:
+            tls.close()
+
+# ---------- Results ----------
+class ResultTable:
+    # sütun tabanlı, sıkı sonuç deposu: host indeksi / port / durum kodu / gecikme / timeout dizileri,
+    # banner ve hata metinleri intern edilir; host -> satır indeksi özet ve raporları doğrusal yapar
+    def __init__(self) -> None:
+        self._hosts: List[str] = []
+        self._host_idx: Dict[str, int] = {}
+        self._rows_by_host: List[array] = []
+        self._texts: List[str] = [""]
+        self._text_idx: Dict[str, int] = {"": 0}
+        self.host = array("I")
+        self.port = array("H")
+        self.state = array("B")
+        self.latency = array("i")      # -1 = None
+        self.timeout = array("i")      # -1 = None
+        self.text = array("I")         # banner (ERROR için hata ayrıntısı)
+        self.service = array("I")
+
+    def touch(self, host: str) -> int:
+        # satır eklemeden host'u kaydeder (özette "none" görünsün diye)
+        i = self._host_idx.get(host)
+        if i is None:
+            i = self._host_idx[host] = len(self._hosts)
+            self._hosts.append(host); self._rows_by_host.append(array("I"))
+        return i
+
+    def _intern(self, text: str) -> int:
+        i = self._text_idx.get(text)
+        if i is None:
+            i = self._text_idx[text] = len(self._texts); self._texts.append(text)
+        return i
+
+    def append(self, r: PortResult) -> None:
+        h = self.touch(r.host)
+        code, detail = State.encode(r.state)
+        self._rows_by_host[h].append(len(self.port))
+        self.host.append(h)
+        self.port.append(r.port)
+        self.state.append(code)
+        self.latency.append(-1 if r.latency_ms is None else r.latency_ms)
+        self.timeout.append(-1 if r.timeout_ms is None else r.timeout_ms)
+        self.text.append(self._intern(detail if code is State.ERROR else r.banner))
+        self.service.append(self._intern(r.service))
+
+    def __len__(self) -> int:
+        return len(self.port)
+
+    def row(self, i: int) -> PortResult:
+        code = State(self.state[i])
+        text = self._texts[self.text[i]]
+        lat, to = self.latency[i], self.timeout[i]
+        return PortResult(self._hosts[self.host[i]], self.port[i],
+                          code.text(text), "" if code is State.ERROR else text,
+                          None if lat < 0 else lat, None if to < 0 else to, self._texts[self.service[i]])
+
+    def __iter__(self) -> Iterator[PortResult]:
+        return (self.row(i) for i in range(len(self)))
+
+    def hosts(self) -> List[str]:
+        return sorted(self._hosts, key=host_sort_key)
+
+    def host_rows(self, host: str) -> List[int]:
+        i = self._host_idx.get(host)
+        if i is None: return []
+        rows = self._rows_by_host[i]
+        return sorted(rows, key=self.port.__getitem__)
+
+    def open_ports(self, host: str) -> List[int]:
+        return [self.port[i] for i in self.host_rows(host) if self.state[i] == State.OPEN]
+
+    def sorted(self) -> Iterator[PortResult]:
+        # host (IP sırası) + port sırasıyla; raporlar bunu okur
+        for host in self.hosts():
+            for i in self.host_rows(host): yield self.row(i)
 
 # ---------- Reporting ----------
+class ResultSink(ABC):
+    # sonuçları tamamlandıkça alan çıktı; tamponlu yazar, en geç `flush_every` sn'de bir diske boşaltır
+    # (uzun taramalarda `tail -f` ile izlenebilir, çökmede yazılmış kısım kaybolmaz)
+    def __init__(self, path: str, drop_closed: bool = False, flush_every: float = 1.0, append: bool = False) -> None:
+        self.path = path
+        self.drop_closed = drop_closed
+        self.flush_every = flush_every
+        self.count = 0
+        self.appended = append and path != "-" and os.path.exists(path) and os.path.getsize(path) > 0
+        self._f = sys.stdout if path == "-" else open(path, "a" if append else "w", encoding="utf-8",
+                                                      newline="", buffering=1 << 16)
+        self._flushed = time.monotonic()
+
+    def write(self, r: PortResult) -> None:
+        if self.drop_closed and r.state == "CLOSED": return
+        self._write(r)
+        self.count += 1
+        now = time.monotonic()
+        if now - self._flushed >= self.flush_every:
+            self._f.flush(); self._flushed = now
+
+    @abstractmethod
+    def _write(self, r: PortResult) -> None: ...
+
+    def close(self) -> None:
+        if self._f is sys.stdout: self._f.flush()
+        else: self._f.close()
+
+class NdjsonSink(ResultSink):
+    def _write(self, r: PortResult) -> None:
+        self._f.write(json.dumps(result_dict(r), ensure_ascii=False) + "\n")
+
+class CsvSink(ResultSink):
+    def __init__(self, path: str, drop_closed: bool = False, flush_every: float = 1.0, append: bool = False) -> None:
+        super().__init__(path, drop_closed, flush_every, append)
+        self._csv = csv.writer(self._f)
+        if not self.appended: self._csv.writerow(list(PortResult.__dataclass_fields__))
+
+    def _write(self, r: PortResult) -> None:
+        self._csv.writerow(astuple_result(r))
+
+_RESULT_FIELDS = tuple(PortResult.__dataclass_fields__)
+
+def astuple_result(r: PortResult) -> Tuple[Any, ...]:
+    return tuple(getattr(r, f) for f in _RESULT_FIELDS)
+
+def result_dict(r: PortResult) -> Dict[str, Any]:
+    # asdict'in derin kopyası yerine sığ dict (alanlar zaten skaler)
+    return {f: getattr(r, f) for f in _RESULT_FIELDS}
+
+def open_sinks(cfg: ScanConfig) -> List[ResultSink]:
+    sinks: List[ResultSink] = []
+    # resume'da akış çıktılarına eklenir (önceki satırlar korunur)
+    if cfg.ndjson_out: sinks.append(NdjsonSink(cfg.ndjson_out, cfg.drop_closed, append=cfg.resume))
+    if cfg.csv_out: sinks.append(CsvSink(cfg.csv_out, cfg.drop_closed, append=cfg.resume))
+    return sinks
+
+def _uncovered_html(uncovered: "UncoveredWork | None") -> str:
+    if not uncovered: return ""
+    d = uncovered.to_dict()
+    rows = [f"<tr><td>{h}</td><td>{p}</td></tr>" for h, p in d["pairs"].items()]
+    rows += [f"<tr><td>{', '.join(b['targets'][:20])}{' ...' if len(b['targets']) > 20 else ''}</td><td>{b['ports']}</td></tr>"
+             for b in d["blocks"]]
+    return (f"<h2>Not covered (deadline)</h2><p>Scan stopped at --max-duration; {uncovered.count():,} (host, port)"
+            f" pairs were not probed.</p><table><thead><tr><th>Hosts</th><th>Ports</th></tr></thead>"
+            f"<tbody>{''.join(rows)}</tbody></table>")
+
 class ReportWriter:
     @staticmethod
     def to_json(results: Iterable[PortResult], path: str) -> None:
+        # kayıt kayıt yazılır; tüm sonuçların dict kopyası bellekte toplanmaz
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for i, r in enumerate(results):
+                rec = json.dumps(result_dict(r), indent=2).replace("\n", "\n  ")
+                f.write((",\n  " if i else "\n  ") + rec)
+            f.write("\n]" if f.tell() > 1 else "]")
+
+    @staticmethod
+    def to_uncovered(uncovered: "UncoveredWork", path: str, max_duration: float) -> None:
+        # deadline raporu: tarama eksik; hangi (host, port) çiftlerinin hiç denenmediği
         with open(path, "w", encoding="utf-8") as f:
-            json.dump([asdict(r) for r in results], f, indent=2)
+            json.dump({"complete": False, "max_duration": max_duration, "uncovered": uncovered.count(),
+                       **uncovered.to_dict()}, f, indent=2)
 
     @staticmethod
-    def to_html(results: Iterable[PortResult], path: str) -> None:
+    def to_html(results: Iterable[PortResult], path: str, uncovered: "UncoveredWork | None" = None) -> None:
         rows = []
         for r in results:
             b = r.banner
             if len(b)>90: b = b[:90] + "..."
-            rows.append(f"<tr><td>{r.host}</td><td>{r.port}</td><td>{r.state}</td><td>{r.latency_ms} ms</td><td><pre>{b}</pre></td></tr>")
+            rows.append(f"<tr><td>{r.host}</td><td>{r.port}</td><td>{r.state}</td><td>{r.service}</td><td>{r.latency_ms} ms</td><td><pre>{b}</pre></td></tr>")
         html = f"""<!doctype html>
 <html><head><meta charset="utf-8"><title>pyScan Report</title>
 <style>
@@ -194,46 +1581,954 @@ pre{{white-space:pre-wrap;margin:0}}
 </style></head><body>
 <h1>pyScan Report</h1>
 <p>Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-<table><thead><tr><th>Host</th><th>Port</th><th>State</th><th>Latency</th><th>Banner/TLS</th></tr></thead>
-<tbody>{''.join(rows)}</tbody></table></body></html>"""
+<table><thead><tr><th>Host</th><th>Port</th><th>State</th><th>Service</th><th>Latency</th><th>Banner/TLS</th></tr></thead>
+<tbody>{''.join(rows)}</tbody></table>{_uncovered_html(uncovered)}</body></html>"""
         with open(path, "w", encoding="utf-8") as f:
             f.write(html)
 
+# ---------- Journal ----------
+class PortCoverage:
+    # host -> sıralı, birleştirilmiş [a, b] port aralıkları
+    def __init__(self) -> None:
+        self._h: Dict[str, List[List[int]]] = {}
+
+    def add(self, host: str, a: int, b: int | None = None) -> None:
+        b = a if b is None else b
+        iv = self._h.setdefault(host, [])
+        lo = bisect.bisect_left(iv, [a, -1])
+        if lo and iv[lo-1][1] >= a - 1: lo -= 1
+        hi = lo
+        while hi < len(iv) and iv[hi][0] <= b + 1: hi += 1
+        if lo < hi:
+            a = min(a, iv[lo][0]); b = max(b, iv[hi-1][1])
+        iv[lo:hi] = [[a, b]]
+
+    def contains(self, host: str, port: int) -> bool:
+        iv = self._h.get(host)
+        if not iv: return False
+        i = bisect.bisect_right(iv, [port, 1 << 30]) - 1
+        return i >= 0 and iv[i][1] >= port
+
+    def has_host(self, host: str) -> bool:
+        return host in self._h
+
+    def count(self) -> int:
+        return sum(b - a + 1 for iv in self._h.values() for a, b in iv)
+
+    def hosts(self) -> Iterator[str]:
+        return iter(self._h)
+
+    def intervals(self, host: str) -> List[List[int]]:
+        return self._h.get(host, [])
+
+    def ports(self, host: str) -> Iterator[int]:
+        for a, b in self.intervals(host):
+            yield from range(a, b + 1)
+
+    def update(self, other: "PortCoverage") -> None:
+        for h in other.hosts():
+            for a, b in other.intervals(h): self.add(h, a, b)
+
+    def clear(self) -> None:
+        self._h.clear()
+
+    def __bool__(self) -> bool:
+        return bool(self._h)
+
+class UncoveredWork:
+    # deadline'da taranamayan işler: tek tek çiftler (host başına aralık) + (hostlar x portlar) blokları;
+    # bloklar kuyruğa hiç girmemiş işi tek tek açmadan tutar (ör. /16 x 60000 port)
+    def __init__(self) -> None:
+        self.pairs = PortCoverage()
+        self.blocks: List[Tuple[List[str], List[int]]] = []
+
+    def add(self, host: str, port: int) -> None:
+        self.pairs.add(host, port)
+
+    def block(self, hosts: List[str], ports: List[int]) -> None:
+        if not hosts or not ports: return
+        b = (list(hosts), sorted(ports))
+        if b not in self.blocks: self.blocks.append(b)   # port shard'ları aynı bloğu tekrar bildirebilir
+
+    def count(self) -> int:
+        return self.pairs.count() + sum(count_hosts(h) * len(p) for h, p in self.blocks)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"pairs": {h: format_ranges(self.pairs.ports(h)) for h in sorted(self.pairs.hosts(), key=host_sort_key)},
+                "blocks": [{"targets": h, "ports": format_ranges(p)} for h, p in self.blocks]}
+
+    def merge(self, d: Dict[str, Any]) -> None:
+        for h, rng in d.get("pairs", {}).items():
+            for a, b in parse_intervals(rng): self.pairs.add(h, a, b)
+        for b in d.get("blocks", []):
+            self.block(b["targets"], parse_ports(b["ports"]))
+
+    def __bool__(self) -> bool:
+        return bool(self.pairs) or bool(self.blocks)
+
+class ScanJournal:
+    # append-only ilerleme kaydı:
+    #   H {"targets": [...], "ports": "1-1024"}        tarama başlığı
+    #   D <state> <host> <a-b,c,...>                 banner'sız CLOSED / FILTERED sonuçlar, aralık olarak
+    #   R {PortResult json}                          diğer sonuçlar (OPEN, ERROR, banner'lı)
+    # yazımlar tamponlanır; en fazla `batch` sonuç ya da `flush_every` sn'de bir diske iner
+    RANGE_STATES = ("CLOSED", "FILTERED/TIMEOUT")
+
+    def __init__(self, path: str, batch: int = 10000, flush_every: float = 2.0) -> None:
+        self.path = path
+        self.batch = batch
+        self.flush_every = flush_every
+        self.done = PortCoverage()                                  # atlanacak işler (tüm durumlar)
+        self.ranges = {st: PortCoverage() for st in self.RANGE_STATES}
+        self.records: Dict[Tuple[str, int], PortResult] = {}
+        self._pending = {st: PortCoverage() for st in self.RANGE_STATES}
+        self._pending_recs: List[PortResult] = []
+        self._npending = 0
+        self._flushed = time.monotonic()
+        self._f = None
+
+    def load(self) -> Dict[str, Any] | None:
+        header = None
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                kind, _, rest = line.rstrip("\n").partition(" ")
+                try:
+                    if kind == "H":
+                        header = json.loads(rest)
+                    elif kind == "D":
+                        st, host, rng = rest.split(" ")
+                        for a, b in parse_intervals(rng):
+                            self.ranges[st].add(host, a, b); self.done.add(host, a, b)
+                    elif kind == "R":
+                        r = PortResult(**json.loads(rest))
+                        self.records[(r.host, r.port)] = r; self.done.add(r.host, r.port)
+                except (ValueError, KeyError, TypeError):
+                    pass    # yarım yazılmış son satır (çökme)
+        return header
+
+    def open(self, header: Dict[str, Any], resume: bool) -> None:
+        # resume'da dosya sıkıştırılarak yeniden yazılır, sonra eklemeye devam edilir
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("H " + json.dumps(header) + "\n")
+            if resume:
+                for st, cov in self.ranges.items(): self._write_ranges(f, st, cov)
+                for r in self.records.values(): f.write("R " + json.dumps(result_dict(r), ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._f = open(self.path, "a", encoding="utf-8", buffering=1 << 16)
+
+    def record(self, r: PortResult) -> None:
+        if r.state in self._pending and not r.banner:
+            self._pending[r.state].add(r.host, r.port)
+        else:
+            self._pending_recs.append(r)
+        self._npending += 1
+        if self._npending >= self.batch or time.monotonic() - self._flushed >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._f is None: return
+        for st, cov in self._pending.items():
+            self._write_ranges(self._f, st, cov); cov.clear()
+        for r in self._pending_recs:
+            self._f.write("R " + json.dumps(result_dict(r), ensure_ascii=False) + "\n")
+        self._pending_recs.clear()
+        self._npending = 0
+        self._f.flush()
+        try: os.fsync(self._f.fileno())
+        except OSError: pass
+        self._flushed = time.monotonic()
+
+    def close(self) -> None:
+        if self._f is None: return
+        self.flush(); self._f.close(); self._f = None
+
+    def previous_results(self) -> Iterator[PortResult]:
+        # journal'dan önceki sonuçlar; aralık olarak tutulanların gecikmesi bilinmez (None)
+        yield from self.records.values()
+        for st, cov in self.ranges.items():
+            for host in cov.hosts():
+                for p in cov.ports(host):
+                    yield PortResult(host, p, st)
+
+    @staticmethod
+    def _write_ranges(f, state: str, cov: PortCoverage) -> None:
+        for host in cov.hosts():
+            f.write(f"D {state} {host} {','.join(f'{a}-{b}' if a != b else str(a) for a, b in cov.intervals(host))}\n")
+
+# ---------- History (SQLite) ----------
+class ResultStore:
+    # (host, port) başına son sonuç + değişiklik geçmişi. record() değişiklik türünü döner:
+    # "opened" (yeni açık), "closed" (önceden açıktı), "banner" (banner/TLS değişti) ya da None
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results(
+        host TEXT NOT NULL, port INTEGER NOT NULL, state TEXT NOT NULL, banner TEXT NOT NULL DEFAULT '',
+        latency_ms INTEGER, first_seen REAL NOT NULL, last_seen REAL NOT NULL, last_changed REAL NOT NULL,
+        service TEXT NOT NULL DEFAULT '', PRIMARY KEY (host, port)) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS results_open ON results(state) WHERE state = 'OPEN';
+    CREATE INDEX IF NOT EXISTS results_seen ON results(last_seen);
+    CREATE TABLE IF NOT EXISTS changes(
+        ts REAL NOT NULL, host TEXT NOT NULL, port INTEGER NOT NULL, kind TEXT NOT NULL,
+        old_state TEXT, new_state TEXT NOT NULL, old_banner TEXT, new_banner TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS changes_hp ON changes(host, port);
+    """
+
+    def __init__(self, path: str, batch: int = 5000, flush_every: float = 2.0) -> None:
+        self.db = sqlite3.connect(path)
+        self.db.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + self.SCHEMA)
+        if "service" not in {c[1] for c in self.db.execute("PRAGMA table_info(results)")}:   # eski şema
+            self.db.execute("ALTER TABLE results ADD COLUMN service TEXT NOT NULL DEFAULT ''")
+        self.batch = batch
+        self.flush_every = flush_every
+        self.changes: Dict[str, int] = {"opened": 0, "closed": 0, "banner": 0}
+        self._rows: List[Tuple[Any, ...]] = []
+        self._chg: List[Tuple[Any, ...]] = []
+        self._flushed = time.monotonic()
+
+    # TLS özetindeki kalan gün sayısı her gün değişir; banner karşılaştırmasında yok sayılır
+    _VOLATILE = re.compile(r"expires_in=-?\d+d")
+
+    @classmethod
+    def fingerprint(cls, banner: str) -> str:
+        # banner karşılaştırma anahtarı: her çalıştırmada değişen parçalar atılır. HTTP yanıtında yalnızca durum
+        # satırı ve Server başlığı tutulur (Date, Content-Length, ETag, Set-Cookie ... her istekte değişebilir)
+        lines = [ln.strip() for ln in cls._VOLATILE.sub("", banner).splitlines()]
+        if lines and lines[0].startswith("HTTP/"):
+            lines = lines[:1] + [ln for ln in lines[1:] if ln.lower().startswith("server:")]
+        return "\n".join(ln for ln in lines if ln)
+
+    def record(self, r: PortResult) -> str | None:
+        now = time.time()
+        prev = self.db.execute("SELECT state, banner, service FROM results WHERE host=? AND port=?",
+                               (r.host, r.port)).fetchone()
+        # servis ve normalize banner karşılaştırılır; eski şemadan gelen satırda servis boştur
+        same = prev is not None and (not prev[2] or prev[2] == r.service) and \
+            self.fingerprint(prev[1]) == self.fingerprint(r.banner)
+        kind = None
+        if r.state == "OPEN" and (prev is None or prev[0] != "OPEN"): kind = "opened"
+        elif r.state != "OPEN" and prev is not None and prev[0] == "OPEN": kind = "closed"
+        elif r.state == "OPEN" and not same: kind = "banner"
+        changed = prev is None or prev[0] != r.state or not same
+        self._rows.append((r.host, r.port, r.state, r.banner, r.latency_ms, now, now, now, r.service, int(changed)))
+        if kind:
+            self.changes[kind] += 1
+            self._chg.append((now, r.host, r.port, kind, prev and prev[0], r.state, prev and prev[1], r.banner))
+        if len(self._rows) >= self.batch or time.monotonic() - self._flushed >= self.flush_every:
+            self.flush()
+        return kind
+
+    def flush(self) -> None:
+        with self.db:
+            self.db.executemany("""
+                INSERT INTO results(host, port, state, banner, latency_ms, first_seen, last_seen, last_changed, service)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(host, port) DO UPDATE SET
+                    state=excluded.state, banner=excluded.banner, latency_ms=excluded.latency_ms,
+                    last_seen=excluded.last_seen, service=excluded.service,
+                    last_changed=CASE WHEN ?10 THEN excluded.last_changed ELSE results.last_changed END
+            """, self._rows)
+            self.db.executemany("INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._chg)
+        self._rows.clear(); self._chg.clear()
+        self._flushed = time.monotonic()
+
+    def open_ports(self, match: Callable[[str], bool]) -> List[Tuple[str, int]]:
+        rows = self.db.execute("SELECT host, port FROM results WHERE state = 'OPEN'").fetchall()
+        # port-major: doğrulama turu da hostlara dönüşümlü dağılır
+        return sorted(((h, p) for h, p in rows if match(h)), key=lambda x: (x[1], host_sort_key(x[0])))
+
+    def fresh(self, match: Callable[[str], bool], stale_after: float) -> PortCoverage:
+        # her çiftin bayatlama süresi hash ile [0.5, 1.5] x stale_after aralığına yayılır; ilk tam taramadan
+        # sonra her gece tüm alan yerine dönen küçük bir dilim bayatlar
+        now = time.time()
+        cov = PortCoverage()
+        rows = self.db.execute("SELECT host, port, last_seen FROM results WHERE last_seen >= ? ORDER BY host, port",
+                               (now - 1.5 * stale_after,))
+        for h, p, seen in rows:
+            if not match(h): continue
+            spread = 0.5 + zlib.crc32(f"{h}:{p}".encode()) / 0xFFFFFFFF
+            if now - seen < stale_after * spread: cov.add(h, p)
+        return cov
+
+    def close(self) -> None:
+        self.flush(); self.db.close()
+
+async def differential_scan(scanner: "AsyncPortScanner", store: ResultStore, emit: Callable[[PortResult], None]) -> None:
+    # 1) önceden açık portlar yeniden doğrulanır  2) kalan alanda yalnızca bayat (host, port) çiftleri taranır
+    cfg = scanner.cfg
+    match = target_matcher(cfg.targets)
+    known = store.open_ports(match)
+    fresh = store.fresh(match, cfg.stale_after * 3600)
+    await scanner.scan_pairs(known, emit)
+    for h, p in known: fresh.add(h, p)
+    if scanner.done: fresh.update(scanner.done)
+    scanner.done = fresh
+    await scanner.scan(emit)
+
+# ---------- Multi-process ----------
+def shard_configs(cfg: ScanConfig) -> List[ScanConfig]:
+    # global bütçeler (concurrency, rate, stage 2 havuzu) süreçlere bölünür. Hostlar ardışık aralıklar olarak
+    # paylaştırılır; host sayısı süreç sayısından azsa port listesi dilimlenir, o zaman host başına sınırlar da
+    # bölünür (aynı host tüm süreçlerde)
+    n = max(1, min(cfg.workers, cfg.concurrency))      # -c'den fazla süreç toplam bütçeyi aşardı
+    by = "host" if count_hosts(cfg.targets) >= n else "port"
+    parts = split_targets(cfg.targets, n, cfg.discovery) if by == "host" else None
+    def share(v: int, k: int) -> int:
+        # tam sayı bütçe: kalan ilk shard'lara dağıtılır, toplam tam olarak v (0 = sınırsız/otomatik korunur;
+        # süreç sayısından küçük yan bütçelerde her sürece en az 1)
+        return max(1, v // n + (k < v % n)) if v > 0 else v
+    out = []
+    for k in range(n):
+        c = ScanConfig(**{f: getattr(cfg, f) for f in cfg.__dataclass_fields__})
+        c.workers, c.shard, c.shards, c.shard_by = 1, k, n, by
+        if parts is not None: c.targets = parts[k]
+        c.concurrency = share(cfg.concurrency, k)
+        c.enrich_concurrency = share(cfg.enrich_concurrency, k)
+        c.enrich_backlog = share(cfg.enrich_backlog, k)
+        c.rate = cfg.rate / n
+        c.burst = share(cfg.burst, k)
+        if by == "port":
+            c.host_concurrency = share(cfg.host_concurrency, k)
+            c.host_rate = cfg.host_rate / n
+        out.append(c)
+    return out
+
+def _shard_main(cfg: ScanConfig, done: PortCoverage | None, out: "mp.Queue") -> None:
+    # alt süreç: kendi event loop'u ve tarayıcısı; sonuçlar toplu (tuple) olarak ebeveyne akar
+    batch: List[Tuple[Any, ...]] = []
+    last = time.monotonic()
+    def emit(r: PortResult) -> None:
+        nonlocal last
+        batch.append(astuple_result(r))
+        if len(batch) >= 1000 or time.monotonic() - last >= 0.2:
+            out.put(("r", batch[:])); batch.clear(); last = time.monotonic()
+    scanner = AsyncPortScanner(cfg, done=done)
+    try:
+        asyncio.run(scanner.scan(emit))
+        final = ("done", (cfg.shard, scanner.stats()))
+    except KeyboardInterrupt:
+        final = ("error", (cfg.shard, "interrupted"))
+    except Exception as e:
+        final = ("error", (cfg.shard, repr(e)))
+    if batch: out.put(("r", batch))
+    out.put(final)
+
+def run_sharded(cfg: ScanConfig, done: PortCoverage | None, emit: Callable[[PortResult], None]) -> Dict[str, Any]:
+    shards = shard_configs(cfg)
+    out: mp.Queue = mp.Queue(maxsize=256)
+    procs = [mp.Process(target=_shard_main, args=(c, done, out), daemon=True) for c in shards]
+    for p in procs: p.start()
+    stats: List[Dict[str, Any]] = []
+    ended: set = set()                     # done ya da error bildiren shard'lar
+    failed: List[int] = []
+    try:
+        while len(ended) < len(procs):
+            try:
+                kind, payload = out.get(timeout=0.5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs) and out.empty():
+                    lost = [k for k in range(len(procs)) if k not in ended]
+                    print(f"[-] worker(s) {', '.join(map(str, lost))} exited without finishing", file=sys.stderr)
+                    failed += lost
+                    break
+                continue
+            if kind == "r":
+                for t in payload: emit(PortResult(*t))
+            elif kind == "error":
+                k, msg = payload
+                print(f"[-] shard {k}: {msg}", file=sys.stderr)
+                ended.add(k); failed.append(k)
+            else:
+                k, st = payload
+                ended.add(k); stats.append(st)
+    finally:
+        for p in procs:
+            p.join(timeout=1.0)
+            if p.is_alive(): p.terminate()
+    # çöken / hata veren shard'ın tüm alanı kapsanmamış sayılır (önceden gelen sonuçlar journal'da, resume atlar)
+    lost = UncoveredWork()
+    for k in failed:
+        c = shards[k]
+        ports = rank_ports(c.ports)
+        lost.block(c.targets, ports[c.shard::c.shards] if c.shard_by == "port" else ports)
+    if lost: stats.append({"uncovered": lost.to_dict()})
+    total = merge_stats(stats, shards[0].shard_by if shards else "host")
+    total["failed_shards"] = len(failed)
+    return total
+
+def merge_stats(stats: List[Dict[str, Any]], shard_by: str = "host") -> Dict[str, Any]:
+    total: Dict[str, Any] = {}
+    for st in stats:
+        for k, v in st.items():
+            if k == "discovered":
+                if v is None: continue
+                prev = total.get(k)
+                # port shard'ında her süreç aynı hostları keşfeder
+                total[k] = v if prev is None or shard_by == "port" else (prev[0] + v[0], prev[1] + v[1])
+            elif k == "uncovered":
+                if v is None: continue
+                unc = UncoveredWork()
+                if total.get(k): unc.merge(total[k])
+                unc.merge(v)
+                total[k] = unc.to_dict()
+            elif isinstance(v, int):
+                total[k] = (total.get(k) or 0) + v
+            else:
+                total.setdefault(k, v)
+    return total
+
+# ---------- Distributed (coordinator / worker) ----------
+# TCP üzerinde satır başına bir JSON mesaj:
+#   worker -> {"op": "hello", "token": ...}             coordinator -> {"op": "ok"} (token yanlışsa bağlantı kapanır)
+#   worker -> {"op": "next"}                            coordinator -> {"op": "lease", ...} | {"op": "wait"} | {"op": "bye"}
+#   worker -> {"op": "r", "id": n, "rows": [...]}       sonuçlar tarama sürerken akar (lease'i yeniler)
+#   worker -> {"op": "hb", "id": n}                     sonuç yokken canlılık sinyali
+#   worker -> {"op": "done", "id": n, "stats": {...}} | {"op": "error", "id": n, "msg": "..."}
+# lease_timeout boyunca sessiz kalan ya da bağlantısı kopan worker'ın lease'i kuyruğa geri döner; yeni worker
+# önceden gelmiş sonuçları atlar (skip), geç gelen kopyalar coordinator'da elenir
+_LEASE_FIELDS = ("concurrency", "adaptive_concurrency", "host_concurrency", "timeout", "jitter", "rate", "host_rate",
+                 "burst", "retries", "adaptive_timeout", "min_timeout", "max_timeout", "engine", "enrich",
+                 "enrich_concurrency", "enrich_timeout", "enrich_backlog", "discovery", "discovery_ports", "dns_ttl", "max_duration")
+_LINE_LIMIT = 1 << 24
+_MAX_ATTEMPTS = 3
+
+@dataclass(eq=False)
+class Lease:
+    id: int
+    targets: List[str]
+    ports: List[int]
+    got: PortCoverage = field(default_factory=PortCoverage)   # coordinator'a ulaşmış (host, port) çiftleri
+    holder: Any = None             # lease'i tutan bağlantı (None = kuyrukta)
+    deadline: float = 0.0
+    attempts: int = 0
+
+def _piece_targets(net, sub) -> List[str]:
+    # alt ağ üst ağın host kümesini aynen korumalı: iter_hosts alt ağın kendi ağ/yayın adreslerini atlar,
+    # üst ağınki değilse bunlar tek adres olarak eklenir (keşifsiz taranırlar)
+    skip = {net.network_address, net.broadcast_address} if net.num_addresses > 2 else set()
+    if sub.num_addresses > 2:
+        edges = [sub.network_address] + ([sub.broadcast_address] if sub.version == 4 else [])
+        return [str(sub)] + [str(a) for a in edges if a not in skip]
+    return [str(a) for a in sub if a not in skip]
+
+def plan_leases(targets: List[str], ports: List[int], size: int) -> Iterator[Tuple[List[str], List[int]]]:
+    # hedef x port uzayı en fazla ~size çiftlik lease'lere bölünür: büyük CIDR'lar alt ağlara, tek hosta
+    # sığmayan port listesi dilimlere; küçük hedefler tek lease'te toplanır. Tembel üretilir (/8 için de)
+    size = max(1, size)
+    per = max(1, size // max(1, len(ports)))        # lease başına adres
+    chunks = [ports[i:i + size] for i in range(0, len(ports), size)] or [[]]
+    def pieces() -> Iterator[List[str]]:
+        for spec in targets:
+            net = _as_network(spec)
+            if net is None or count_hosts([spec]) <= per:
+                r = _as_range(spec)
+                if net is None and r is not None and r[2] - r[1] >= per:
+                    for lo in range(r[1], r[2] + 1, per):     # "a-b" aralığı per adreslik dilimlere
+                        yield [_range_spec(r[0], lo, min(r[2], lo + per - 1))]
+                else:
+                    yield [spec]
+                continue
+            prefix = net.max_prefixlen - (per.bit_length() - 1)
+            for sub in net.subnets(new_prefix=max(prefix, net.prefixlen)):
+                specs = _piece_targets(net, sub)
+                if specs: yield specs
+    batch: List[str] = []
+    n = 0
+    for specs in pieces():
+        k = count_hosts(specs)
+        if batch and n + k > per:
+            for c in chunks: yield batch, c
+            batch, n = [], 0
+        batch = batch + specs; n += k
+    if batch:
+        for c in chunks: yield batch, c
+
+def _split_addr(addr: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    host, _, port = addr.rpartition(":")
+    return (host.strip("[]") or default_host), int(port)
+
+async def _send(writer: asyncio.StreamWriter, msg: Dict[str, Any]) -> None:
+    writer.write(json.dumps(msg, ensure_ascii=False).encode() + b"\n")
+    await writer.drain()
+
+async def _recv(reader: asyncio.StreamReader) -> Dict[str, Any] | None:
+    line = await reader.readline()
+    return json.loads(line) if line else None
+
+class Coordinator:
+    def __init__(self, cfg: ScanConfig, done: PortCoverage | None, emit: Callable[[PortResult], None]) -> None:
+        self.cfg = cfg
+        self.done = done            # resume: journal'da tamamlanmış çiftler lease'lere skip olarak eklenir
+        self.emit = emit
+        self._plan = plan_leases(cfg.targets, rank_ports(cfg.ports), cfg.lease_size)
+        self._planned = False       # plan tükendi mi
+        self._ids = iter(range(1 << 62))
+        self._retry: collections.deque = collections.deque()
+        self.leases: Dict[int, Lease] = {}           # tamamlanmamış, oluşturulmuş lease'ler
+        self._conns: Dict[Any, str] = {}             # writer -> worker adı
+        self._handlers: set = set()
+        self._finished = asyncio.Event()
+        self.lease_stats: List[Dict[str, Any]] = []
+        self.deadline: float | None = None           # max_duration: bu andan sonra lease verilmez
+        self.uncovered = UncoveredWork()             # deadline'da bitmemiş lease'lerin kalan kısmı
+        self.completed = self.reassigned = self.failed = self.duplicates = self.workers_seen = 0
+
+    async def run(self) -> Dict[str, Any]:
+        host, port = _split_addr(self.cfg.serve)
+        server = await asyncio.start_server(self._handle, host, port, limit=_LINE_LIMIT)
+        addr = server.sockets[0].getsockname()
+        print(f"[i] Coordinator listening on {addr[0]}:{addr[1]} (lease <= {self.cfg.lease_size} pairs, timeout {self.cfg.lease_timeout}s)")
+        procs = [mp.Process(target=worker_process, args=(f"{addr[0]}:{addr[1]}", self.cfg.token), daemon=True)
+                 for _ in range(self.cfg.local_workers)]
+        for p in procs: p.start()
+        if self.cfg.max_duration > 0: self.deadline = time.monotonic() + self.cfg.max_duration
+        watchdog = asyncio.create_task(self._expire())
+        try:
+            await self._finished.wait()
+            for w in list(self._conns):
+                try: await _send(w, {"op": "bye"})
+                except (OSError, ConnectionError): pass
+        finally:
+            watchdog.cancel()
+            server.close()
+            # worker'lar "bye" ile ayrılır; kalan bağlantılar kapatılınca handler'lar EOF ile kendiliğinden biter
+            if self._handlers: await asyncio.wait(self._handlers, timeout=2.0)
+            for w in list(self._conns): w.close()
+            if self._handlers: await asyncio.wait(self._handlers, timeout=1.0)
+            for p in procs:
+                await asyncio.to_thread(p.join, 2.0)
+                if p.is_alive(): p.terminate()
+        print(f"[i] Leases: completed={self.completed} reassigned={self.reassigned} failed={self.failed}"
+              f" workers={self.workers_seen} duplicates_dropped={self.duplicates}")
+        stats = merge_stats(self.lease_stats + ([{"uncovered": self.uncovered.to_dict()}] if self.uncovered else []))
+        # AIMD penceresi lease başına anlamlı; toplamı yanıltıcı olur
+        stats["window"] = stats["max_window"] = None
+        stats["failed_leases"] = self.failed
+        return stats
+
+    def _take(self, holder: Any) -> Lease | None:
+        if self.deadline is not None and time.monotonic() >= self.deadline: return None
+        if self._retry:
+            lease = self._retry.popleft()
+        else:
+            try:
+                specs, ports = next(self._plan)
+            except StopIteration:
+                self._planned = True; self._check_finished()
+                return None
+            lease = Lease(next(self._ids), specs, ports)
+            if self.done:
+                match = target_matcher(specs)
+                for h in self.done.hosts():
+                    if match(h):
+                        for a, b in self.done.intervals(h): lease.got.add(h, a, b)
+            self.leases[lease.id] = lease
+        lease.holder = holder; lease.attempts += 1
+        lease.deadline = time.monotonic() + self.cfg.lease_timeout
+        return lease
+
+    def _release(self, lease: Lease, why: str) -> None:
+        lease.holder = None
+        if lease.attempts >= _MAX_ATTEMPTS:
+            # tekrar tekrar worker düşüren lease sonsuza dek dönmesin; kapsanmayan kısım raporlanır
+            print(f"[-] lease {lease.id} ({', '.join(lease.targets[:3])} ports {format_ranges(lease.ports)}) "
+                  f"failed {lease.attempts} times ({why}); giving up", file=sys.stderr)
+            del self.leases[lease.id]; self.failed += 1
+            self._check_finished()
+            return
+        print(f"[!] lease {lease.id} {why}; reassigning", file=sys.stderr)
+        self._retry.append(lease); self.reassigned += 1
+
+    def _check_finished(self) -> None:
+        if self.leases: return
+        if self._planned: self._finished.set()
+        elif self.deadline is not None and time.monotonic() >= self.deadline: self._cutoff()
+
+    def _cutoff(self) -> None:
+        # deadline + grace: worker'lar kendi deadline'larında durup raporlamış olmalı; hâlâ açık lease'lerin
+        # gelmemiş çiftleri ve hiç verilmemiş plan uncovered'a yazılır
+        for lease in self.leases.values():
+            if not lease.got:
+                self.uncovered.block(lease.targets, lease.ports); continue
+            for h, p in iter_work(lambda: iter_hosts(lease.targets), lease.ports):
+                if not lease.got.contains(h, p): self.uncovered.add(h, p)
+        for specs, ports in self._plan:
+            self.uncovered.block(specs, ports)
+        self.leases.clear(); self._retry.clear()
+        self._planned = True; self._finished.set()
+
+    async def _expire(self) -> None:
+        while True:
+            await asyncio.sleep(min(1.0, self.cfg.lease_timeout / 4))
+            now = time.monotonic()
+            if self.deadline is not None and now > self.deadline + min(5.0, self.cfg.lease_timeout):
+                self._cutoff(); return
+            for lease in list(self.leases.values()):
+                if lease.holder is not None and lease.deadline < now:
+                    self._release(lease, f"expired on {self._conns.get(lease.holder, '?')}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        name = f"{peer[0]}:{peer[1]}" if peer else "?"
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            hello = await asyncio.wait_for(_recv(reader), timeout=10)
+            if not hello or hello.get("op") != "hello" or hello.get("token", "") != self.cfg.token:
+                print(f"[-] rejected worker {name}", file=sys.stderr); return
+            self._conns[writer] = name; self.workers_seen += 1
+            await _send(writer, {"op": "ok"})
+            print(f"[i] worker {name} joined")
+            while (msg := await _recv(reader)) is not None:
+                op = msg.get("op")
+                if op == "next":
+                    await self._next(writer)
+                    continue
+                lease = self.leases.get(msg.get("id"))
+                if lease is None: continue              # tamamlanmış / bırakılmış lease'in geç mesajı
+                if lease.holder is writer:
+                    lease.deadline = time.monotonic() + self.cfg.lease_timeout
+                if op == "r":
+                    for t in msg["rows"]:
+                        r = PortResult(*t)
+                        if lease.got.contains(r.host, r.port):
+                            self.duplicates += 1; continue
+                        lease.got.add(r.host, r.port); self.emit(r)
+                elif op == "done":
+                    # bayat worker'ın done'ı da geçerli: sonuçları aynı bağlantıdan sırayla geldi
+                    del self.leases[lease.id]
+                    if lease in self._retry: self._retry.remove(lease)
+                    self.completed += 1; self.lease_stats.append(msg.get("stats") or {})   # worker'ın uncovered'ı dahil
+                    self._check_finished()
+                elif op == "error" and lease.holder is writer:
+                    self._release(lease, f"failed on {name}: {msg.get('msg')}")
+        except (OSError, ConnectionError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            self._conns.pop(writer, None)
+            for lease in list(self.leases.values()):
+                if lease.holder is writer: self._release(lease, f"lost with worker {name}")
+            writer.close()
+
+    async def _next(self, writer: asyncio.StreamWriter) -> None:
+        lease = self._take(writer)
+        if lease is None:
+            await _send(writer, {"op": "bye"} if self._finished.is_set() else {"op": "wait", "delay": 1.0})
+            return
+        skip = {h: lease.got.intervals(h) for h in lease.got.hosts()}
+        await _send(writer, {"op": "lease", "id": lease.id, "targets": lease.targets, "ports": format_ranges(sorted(lease.ports)),
+                             "skip": skip, "ttl": self.cfg.lease_timeout,
+                             "cfg": {**{f: getattr(self.cfg, f) for f in _LEASE_FIELDS}, **self._budget()}})
+
+    def _budget(self) -> Dict[str, float]:
+        # worker kalan süreyi kendi saatiyle sayar (saat farkı önemsiz)
+        return {"max_duration": max(0.01, self.deadline - time.monotonic())} if self.deadline is not None else {}
+
+async def run_worker(addr: str, token: str = "") -> int:
+    # coordinator'dan lease alır, AsyncPortScanner ile tarar, sonuçları akıtır; "bye" gelince çıkar
+    host, port = _split_addr(addr)
+    for attempt in range(20):
+        try:
+            reader, writer = await asyncio.open_connection(host, port, limit=_LINE_LIMIT); break
+        except OSError:
+            if attempt == 19: raise
+            await asyncio.sleep(0.5)
+    leases = 0
+    try:
+        await _send(writer, {"op": "hello", "token": token})
+        if (await _recv(reader) or {}).get("op") != "ok":
+            raise ConnectionError("coordinator rejected this worker (token?)")
+        while True:
+            await _send(writer, {"op": "next"})
+            msg = await _recv(reader)
+            if msg is None or msg["op"] == "bye": break
+            if msg["op"] == "wait":
+                await asyncio.sleep(msg.get("delay", 1.0)); continue
+            await _work_lease(msg, writer); leases += 1
+    finally:
+        writer.close()
+    return leases
+
+async def _work_lease(msg: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+    cfg = ScanConfig(targets=msg["targets"], ports=parse_ports(msg["ports"]), **msg["cfg"])
+    skip = PortCoverage()
+    for h, ivs in msg["skip"].items():
+        for a, b in ivs: skip.add(h, a, b)
+    scanner = AsyncPortScanner(cfg, done=skip or None)
+    rows: List[Tuple[Any, ...]] = []
+    lid, beat = msg["id"], max(0.5, msg["ttl"] / 3)
+    async def pump() -> None:
+        # sonuçlar 0.2 sn'de bir toplu gönderilir; sonuç yoksa ttl/3'te bir heartbeat
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(0.2)
+            if rows:
+                batch = rows[:1000]; del rows[:1000]
+                await _send(writer, {"op": "r", "id": lid, "rows": batch}); last = time.monotonic()
+            elif time.monotonic() - last >= beat:
+                await _send(writer, {"op": "hb", "id": lid}); last = time.monotonic()
+    task = asyncio.create_task(pump())
+    try:
+        await scanner.scan(lambda r: rows.append(astuple_result(r)))
+        final = {"op": "done", "id": lid, "stats": scanner.stats()}
+    except Exception as e:
+        final = {"op": "error", "id": lid, "msg": repr(e)}
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    while rows:
+        batch = rows[:1000]; del rows[:1000]
+        await _send(writer, {"op": "r", "id": lid, "rows": batch})
+    await _send(writer, final)
+
+def worker_process(addr: str, token: str = "") -> None:
+    # --local-workers için süreç giriş noktası
+    try:
+        asyncio.run(run_worker(addr, token))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ConnectionError) as e:
+        print(f"[-] worker: {e}", file=sys.stderr)
+
 # ---------- CLI ----------
 def build_config_from_args() -> ScanConfig:
     ap = argparse.ArgumentParser(description="pyScan (OOP) — async port scanner (authorized use only)")
-    ap.add_argument("target", help="Host or CIDR, e.g. 192.168.1.0/24 or scanme.nmap.org")
-    ap.add_argument("-p","--ports", help="Ports like '80,443' or '1-1024' (ignored if --profile)")
+    ap.add_argument("target", nargs="*", help="Hosts, CIDRs or ranges, e.g. 192.168.1.0/24 10.0.0.5-10.0.0.40 scanme.nmap.org")
+    ap.add_argument("-iL", "--target-file", action="append", default=[], metavar="FILE",
+                    help="Read targets from FILE ('-' = stdin; whitespace/comma separated, # comments); repeatable")
+    ap.add_argument("--exclude", action="append", default=[], metavar="SPECS",
+                    help="Comma-separated hosts/CIDRs/ranges to skip; repeatable")
+    ap.add_argument("--exclude-file", action="append", default=[], metavar="FILE", help="Read exclusions from FILE")
+    ap.add_argument("-p","--ports", help="Ports like '80,443' or '1-1024' (ignored if --profile/--top-ports)")
     ap.add_argument("--profile", choices=["quick","web","db","common"], help="Port profile")
+    ap.add_argument("--top-ports", type=int, metavar="N", help="Scan the N most frequently open ports (bundled table)")
     ap.add_argument("-c","--concurrency", type=int, default=200)
+    ap.add_argument("--adaptive-concurrency", action="store_true",
+                    help="AIMD in-flight window (grows on clean replies, halves on timeout spikes / EMFILE); -c is the max")
+    ap.add_argument("--host-concurrency", type=int, default=0,
+                    help="Max in-flight probes per host (0 = no cap, default); waiting work does not hold a -c slot")
     ap.add_argument("-t","--timeout", type=float, default=1.2)
     ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--rate", type=float, default=0.0, help="Global connections per second (0 = unlimited)")
+    ap.add_argument("--host-rate", type=float, default=0.0, help="Per-host connections per second (0 = unlimited)")
+    ap.add_argument("--burst", type=int, default=0, help="Token bucket burst size (0 = rate/10)")
     ap.add_argument("--retries", type=int, default=0)
+    ap.add_argument("--adaptive-timeout", action="store_true",
+                    help="Learn per-host connect timeouts from measured RTT (SRTT + 4*RTTVAR)")
+    ap.add_argument("--min-timeout", type=float, default=0.05, help="Adaptive timeout floor (s)")
+    ap.add_argument("--max-timeout", type=float, default=3.0, help="Adaptive timeout ceiling (s)")
+    ap.add_argument("--engine", choices=["stream","socket"], default="stream",
+                    help="stream: asyncio streams; socket: raw non-blocking connect (lighter, faster)")
+    ap.add_argument("--no-enrich", action="store_true", help="Skip banner/TLS stage, report port states only")
+    ap.add_argument("--enrich-concurrency", type=int, default=50, help="Parallel banner/TLS grabs")
+    ap.add_argument("--enrich-timeout", type=float, help="Banner/TLS timeout (default: --timeout)")
+    ap.add_argument("-Pn","--no-discovery", action="store_true",
+                    help="Skip live-host discovery on CIDR ranges and fully scan every address")
+    ap.add_argument("--discovery-ports", default=",".join(map(str, DISCOVERY_PORTS)),
+                    help="Ports tried per address during discovery (any OPEN/CLOSED reply = alive)")
+    ap.add_argument("--dns-ttl", type=float, default=300.0, help="Seconds to cache resolved names")
     ap.add_argument("--json", dest="json_out")
     ap.add_argument("--html", dest="html_out")
+    ap.add_argument("--ndjson", dest="ndjson_out", help="Stream results as NDJSON while scanning ('-' = stdout)")
+    ap.add_argument("--csv", dest="csv_out", help="Stream results as CSV while scanning ('-' = stdout)")
+    ap.add_argument("--journal", help="Progress journal path (default: <json|html>.journal when a report is written; "
+                                      "removed once the scan completes)")
+    ap.add_argument("--resume", action="store_true", help="Skip work already completed in --journal and merge its results")
+    ap.add_argument("--max-duration", type=parse_duration, default=0.0, metavar="TIME",
+                    help="Time budget, e.g. 90, 15m, 2h: retries and banner grabs are shed when the scan falls behind, "
+                         "in-flight probes are cancelled at the deadline and uncovered pairs are reported")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Worker processes; the target x port space and -c/--rate budgets are split among them")
+    ap.add_argument("--serve", metavar="[HOST:]PORT",
+                    help="Coordinator mode: lease target x port shards to --connect workers and write the merged report")
+    ap.add_argument("--connect", metavar="HOST:PORT", help="Worker mode: scan leases from a --serve coordinator")
+    ap.add_argument("--token", default=os.environ.get("PYSCAN_TOKEN", ""),
+                    help="Shared secret between coordinator and workers (default: $PYSCAN_TOKEN)")
+    ap.add_argument("--lease-size", type=int, default=65536, help="Max (host, port) pairs per lease")
+    ap.add_argument("--lease-timeout", type=float, default=30.0,
+                    help="Seconds without word from a worker before its lease is reassigned")
+    ap.add_argument("--local-workers", type=int, default=0, help="With --serve: also start N worker processes here")
+    ap.add_argument("--progress", type=float, default=10.0 if sys.stderr.isatty() else 0.0, metavar="SECS",
+                    help="Print a progress line to stderr every SECS (default: 10 on a terminal, 0 = off)")
+    ap.add_argument("--metrics-port", type=int, help="Serve Prometheus text metrics on 127.0.0.1:PORT/metrics")
+    ap.add_argument("--trace", help="Write per-probe phase timings (pace/slot/connect/queue/banner/tls ms) as NDJSON")
+    ap.add_argument("--db", help="SQLite result history; every result is upserted by (host, port)")
+    ap.add_argument("--diff", action="store_true",
+                    help="With --db: re-probe known open ports first, sweep only stale pairs, report only changes")
+    ap.add_argument("--stale-after", type=float, default=168.0,
+                    help="Hours after which a (host, port) is re-swept in --diff mode (spread 0.5x-1.5x per pair)")
+    ap.add_argument("--drop-closed", action="store_true", help="Do not write CLOSED results to --ndjson/--csv")
     args = ap.parse_args()
+    if not (args.target or args.target_file) and not args.connect:
+        ap.error("target is required (except with --connect)")
 
-    targets = expand_targets(args.target)
-    ports = ports_for_profile(args.profile) if args.profile else parse_ports(args.ports or "1-1024")
+    specs = itertools.chain((t for a in args.target for t in a.split(",") if t.strip()),
+                            *(read_specs(f) for f in args.target_file))
+    excludes = itertools.chain((t for e in args.exclude for t in e.split(",") if t.strip()),
+                               *(read_specs(f) for f in args.exclude_file))
+    try:
+        targets, excluded = build_targets((t.strip() for t in specs), (t.strip() for t in excludes))
+    except (OSError, ValueError) as e:
+        ap.error(str(e))
+    if excluded: print(f"[i] Excluded {excluded:,} addresses/names")
+    if not targets and not args.connect: ap.error("no targets left after exclusions")
+    if args.top_ports is not None:
+        if args.top_ports < 1: ap.error("--top-ports must be >= 1")
+        ports = top_ports(args.top_ports)
+    else:
+        ports = ports_for_profile(args.profile) if args.profile else parse_ports(args.ports or "1-1024")
     return ScanConfig(targets=targets, ports=ports, concurrency=args.concurrency,
-                      timeout=args.timeout, jitter=args.jitter, retries=args.retries,
-                      html_out=args.html_out, json_out=args.json_out)
+                      host_concurrency=args.host_concurrency, adaptive_concurrency=args.adaptive_concurrency,
+                      timeout=args.timeout, jitter=args.jitter,
+                      rate=args.rate, host_rate=args.host_rate, burst=args.burst,
+                      retries=args.retries, max_duration=args.max_duration, engine=args.engine,
+                      adaptive_timeout=args.adaptive_timeout, min_timeout=args.min_timeout,
+                      max_timeout=args.max_timeout,
+                      enrich=not args.no_enrich, enrich_concurrency=args.enrich_concurrency,
+                      enrich_timeout=args.enrich_timeout,
+                      discovery=not args.no_discovery, discovery_ports=parse_ports(args.discovery_ports),
+                      dns_ttl=args.dns_ttl,
+                      html_out=args.html_out, json_out=args.json_out,
+                      ndjson_out=args.ndjson_out, csv_out=args.csv_out, drop_closed=args.drop_closed,
+                      journal=args.journal or (f"{args.json_out or args.html_out}.journal"
+                                               if (args.json_out or args.html_out) else None),
+                      resume=args.resume, workers=max(1, args.workers), db=args.db, diff=args.diff, stale_after=args.stale_after,
+                      serve=args.serve, connect=args.connect, token=args.token, lease_size=args.lease_size,
+                      lease_timeout=args.lease_timeout, local_workers=args.local_workers,
+                      progress=args.progress, metrics_port=args.metrics_port, trace=args.trace)
+
+def open_journal(cfg: ScanConfig) -> ScanJournal | None:
+    if not cfg.journal:
+        if cfg.resume: sys.exit("[-] --resume needs --journal (or --json/--html)")
+        return None
+    journal = ScanJournal(cfg.journal)
+    header = {"targets": cfg.targets, "ports": format_ranges(cfg.ports)}
+    if cfg.resume:
+        if not os.path.exists(cfg.journal): sys.exit(f"[-] journal not found: {cfg.journal}")
+        old = journal.load()
+        if old is not None and old != header:
+            sys.exit(f"[-] {cfg.journal} belongs to a different scan (targets/ports differ)")
+    journal.open(header, cfg.resume)
+    return journal
 
 def main():
     cfg = build_config_from_args()
-    print(f"[i] Targets={len(cfg.targets)} Ports={len(cfg.ports)} c={cfg.concurrency} t={cfg.timeout}")
-    scanner = AsyncPortScanner(cfg)
-    results = asyncio.run(scanner.scan_all())
+    if cfg.connect:
+        # worker modu: tarama ayarları ve çıktılar coordinator'da
+        try:
+            n = asyncio.run(run_worker(cfg.connect, cfg.token))
+        except KeyboardInterrupt:
+            sys.exit("[!] Interrupted; the coordinator will reassign this worker's lease")
+        except (OSError, ConnectionError) as e:
+            sys.exit(f"[-] worker: {e}")
+        print(f"[i] Worker finished {n} lease(s)")
+        return
+    if cfg.diff and not cfg.db: sys.exit("[-] --diff needs --db")
+    if cfg.diff and (cfg.workers > 1 or cfg.serve): sys.exit("[-] --diff runs in a single process; drop --workers/--serve")
+    if cfg.serve and cfg.workers > 1: sys.exit("[-] --serve distributes to workers; use --local-workers instead of --workers")
+    if cfg.trace and (cfg.serve or cfg.workers > 1): sys.exit("[-] --trace needs a single-process scan")
+    journal = open_journal(cfg)
+    store = ResultStore(cfg.db) if cfg.db else None
+    done = journal.done if (journal and cfg.resume) else None
+    trace_f = open(cfg.trace, "w", encoding="utf-8", buffering=1 << 16) if cfg.trace else None
+    trace = (lambda rec: trace_f.write(json.dumps(rec) + "\n")) if trace_f else None
+    scanner = None if (cfg.workers > 1 or cfg.serve) else AsyncPortScanner(cfg, done=done, trace=trace)
+    c = (f"{scanner.max_inflight}{' (adaptive)' if scanner.cc else ''}" if scanner else
+         f"{cfg.concurrency} per worker" if cfg.serve else f"{cfg.concurrency} workers={cfg.workers}")
+    print(f"[i] Targets={count_hosts(cfg.targets)} Ports={len(cfg.ports)} c={c}"
+          f" hc={cfg.host_concurrency} t={cfg.timeout} engine={cfg.engine}")
+    sinks = open_sinks(cfg)
+    # JSON/HTML rapor tüm satırları ister; yalnızca akış çıktısı varsa tabloda sadece OPEN satırlar tutulur
+    results = ResultTable()
+    keep_all = bool(cfg.json_out or cfg.html_out)
+    def collect(r: PortResult) -> None:
+        if keep_all or r.state == "OPEN": results.append(r)
+        else: results.touch(r.host)
+    # tek süreçte sayaçları tarayıcı tutar; --workers/--serve'de sonuçlar burada sayılır (ayrıntılı zamanlayıcılar yok)
+    metrics = scanner.metrics if scanner else ScanMetrics()
+    if scanner is None:
+        metrics.begin("scan", max(0, count_hosts(cfg.targets) * len(cfg.ports) - (done.count() if done else 0)))
+    def emit(r: PortResult) -> None:
+        if scanner is None: metrics.result(r.state)
+        if journal is not None: journal.record(r)
+        kind = store.record(r) if store is not None else None
+        if cfg.diff:
+            # diff modu: raporlara ve akış çıktılarına yalnızca değişen portlar gider
+            if kind is None: return
+            print(f"[Δ] {r.host}:{r.port} {kind} -> {r.state} {' '.join(r.banner.split())[:60]}".rstrip())
+        for sink in sinks: sink.write(r)
+        collect(r)
+    if journal is not None and cfg.resume:
+        # önceki çalıştırmanın sonuçları rapora katılır
+        n = 0
+        for r in journal.previous_results():
+            collect(r); n += 1
+        print(f"[i] Resume: {n} results from {cfg.journal}")
+    reporter = ProgressReporter(metrics, cfg.progress) if cfg.progress > 0 else None
+    if reporter is not None: reporter.start()
+    if cfg.metrics_port is not None:
+        try:
+            srv = start_metrics_server(metrics, cfg.metrics_port)
+            print(f"[i] Metrics -> http://127.0.0.1:{srv.server_address[1]}/metrics")
+        except OSError as e:
+            sys.exit(f"[-] metrics port {cfg.metrics_port}: {e}")
+    try:
+        if cfg.serve:
+            stats = asyncio.run(Coordinator(cfg, done, emit).run())
+        elif scanner is None:
+            stats = run_sharded(cfg, done, emit)
+        else:
+            asyncio.run(differential_scan(scanner, store, emit) if cfg.diff else scanner.scan(emit))
+            stats = scanner.stats()
+    except KeyboardInterrupt:
+        hint = f"; continue with --resume (journal: {cfg.journal})" if journal is not None else ""
+        sys.exit(f"[!] Interrupted{hint}")
+    finally:
+        if reporter is not None:
+            reporter.stop(); print(metrics.progress_line(), file=sys.stderr)
+        if trace_f is not None: trace_f.close()
+        for sink in sinks: sink.close()
+        if journal is not None: journal.close()
+        if store is not None: store.close()
+    if stats.get("window") is not None:
+        print(f"[i] concurrency window={stats['window']} max={stats['max_window']} cuts={stats['cuts']}")
+    if stats.get("dns_hits") or stats.get("dns_misses"):
+        print(f"[i] DNS cache hits={stats['dns_hits']} misses={stats['dns_misses']}")
+    if stats.get("tls_handshakes"):
+        print(f"[i] TLS handshakes={stats['tls_handshakes']} resumed={stats['tls_resumed']} cert_cache_hits={stats['cert_cache_hits']}")
+
+    if store is not None:
+        c = store.changes
+        print(f"[i] DB {cfg.db}: opened={c['opened']} closed={c['closed']} banner_changed={c['banner']}")
 
     # kısa özet
-    for host in cfg.targets:
-        open_ports = [r.port for r in results if r.host==host and r.state=="OPEN"]
-        print(f"[+] {host} open: {', '.join(map(str, open_ports)) or 'none'}")
+    if stats.get("discovered") is not None:
+        print(f"[i] Discovery: {stats['discovered'][0]}/{stats['discovered'][1]} hosts alive")
+    uncovered = UncoveredWork()
+    if stats.get("uncovered"): uncovered.merge(stats["uncovered"])
+    for host in results.hosts():                  # discovery'de cevap vermeyen hostlar tabloda yok
+        print(f"[+] {host} open: {', '.join(map(str, results.open_ports(host))) or 'none'}")
 
+    for sink in sinks:
+        if sink.path != "-": print(f"[+] {type(sink).__name__[:-4].upper()} -> {sink.path} ({sink.count} rows)")
     if cfg.json_out:
-        ReportWriter.to_json(results, cfg.json_out); print(f"[+] JSON -> {cfg.json_out}")
+        ReportWriter.to_json(results.sorted(), cfg.json_out); print(f"[+] JSON -> {cfg.json_out}")
     if cfg.html_out:
-        ReportWriter.to_html(results, cfg.html_out); print(f"[+] HTML -> {cfg.html_out}")
+        ReportWriter.to_html(results.sorted(), cfg.html_out, uncovered); print(f"[+] HTML -> {cfg.html_out}")
+    base = next((o for o in (cfg.json_out, cfg.html_out, cfg.ndjson_out, cfg.csv_out) if o and o != "-"), None)
+    unc_path = os.path.splitext(base)[0] + ".uncovered.json" if base else None
+    if uncovered:
+        # kısmi rapor: hangi çiftlerin hiç denenmediği ayrı dosyada (çıktı yoksa yalnızca özet)
+        hint = f"; continue with --resume (journal: {cfg.journal})" if journal is not None else ""
+        why = (f"{stats['failed_shards']} worker(s) failed" if stats.get("failed_shards") else
+               f"Deadline ({cfg.max_duration:g}s) reached")
+        print(f"[!] {why}: {uncovered.count():,} (host, port) pairs not covered{hint}", file=sys.stderr)
+        if unc_path:
+            ReportWriter.to_uncovered(uncovered, unc_path, cfg.max_duration); print(f"[+] Uncovered -> {unc_path}")
+    elif not (stats.get("failed_leases") or stats.get("failed_shards")):
+        # tarama eksiksiz bitti: devam edilecek iş yok; journal ve önceki kısmi çalıştırmanın uncovered raporu silinir
+        for path in (cfg.journal if journal is not None else None, unc_path if cfg.resume else None):
+            if path and os.path.exists(path): os.remove(path)
 
 if __name__ == "__main__":
     # Etik uyarı: Yalnızca yetkili hedeflerde kullanın.